@@ -0,0 +1,33 @@
+"""add during range to event
+
+Revision ID: 289c285a4127
+Revises: c09a9c75a5ec
+Create Date: 2026-10-18 11:48:05.640213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '289c285a4127'
+down_revision: Union[str, None] = 'c09a9c75a5ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # tsrange() rejects an end before the start, such rows become zero-length events
+    op.execute('UPDATE event SET "end" = start WHERE "end" < start')
+    # Generated [start, end) range, GiST indexed so overlap (&&) and
+    # containment (<@) lookups are served from the index
+    op.add_column('event', sa.Column('during', postgresql.TSRANGE(), sa.Computed('tsrange(start, "end")', persisted=True), nullable=True))
+    op.create_index('ix_event_during', 'event', ['during'], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_during', table_name='event', postgresql_using='gist')
+    op.drop_column('event', 'during')
@@ -0,0 +1,42 @@
+"""add reminder offsets
+
+Revision ID: 3a8d5e61f7c9
+Revises: e4c2f9a07b13
+Create Date: 2026-10-18 14:20:48.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8d5e61f7c9'
+down_revision: Union[str, None] = 'e4c2f9a07b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('reminder_offsets', postgresql.ARRAY(sa.Integer()), nullable=True))
+    op.add_column('event', sa.Column('reminder_offsets', postgresql.ARRAY(sa.Integer()), nullable=True))
+
+    # Notifications become one row per participant and occurrence. Reminders only
+    # live a few minutes ahead, the scheduler regenerates the pending ones
+    op.execute('DELETE FROM notification')
+    op.drop_index('ix_notification_user_id_event_id_send_at', table_name='notification')
+    op.add_column('notification', sa.Column('event_start', sa.DateTime(), nullable=False))
+    op.create_index('ix_notification_user_id_event_id_event_start', 'notification', ['user_id', 'event_id', 'event_start'], unique=True)
+    op.create_index('ix_notification_send_at', 'notification', ['send_at'], unique=False, postgresql_where=sa.text('NOT sent'))
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM notification')
+    op.drop_index('ix_notification_send_at', table_name='notification', postgresql_where=sa.text('NOT sent'))
+    op.drop_index('ix_notification_user_id_event_id_event_start', table_name='notification')
+    op.drop_column('notification', 'event_start')
+    op.create_index('ix_notification_user_id_event_id_send_at', 'notification', ['user_id', 'event_id', 'send_at'], unique=True)
+    op.drop_column('event', 'reminder_offsets')
+    op.drop_column('user', 'reminder_offsets')
@@ -0,0 +1,33 @@
+"""add uploadedfile blob fields
+
+Revision ID: 5c1e7a9d3b24
+Revises: 3a8d5e61f7c9
+Create Date: 2026-10-18 16:05:12.284731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7a9d3b24'
+down_revision: Union[str, None] = '3a8d5e61f7c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('uploadedfile', sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.add_column('uploadedfile', sa.Column('size', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_uploadedfile_sha256'), 'uploadedfile', ['sha256'], unique=False)
+    op.create_index(op.f('ix_uploadedfile_event_id'), 'uploadedfile', ['event_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_uploadedfile_event_id'), table_name='uploadedfile')
+    op.drop_index(op.f('ix_uploadedfile_sha256'), table_name='uploadedfile')
+    op.drop_column('uploadedfile', 'size')
+    op.drop_column('uploadedfile', 'sha256')
@@ -0,0 +1,27 @@
+"""add event start id index
+
+Revision ID: 6d1f0b7c2e84
+Revises: 289c285a4127
+Create Date: 2026-10-18 12:31:52.407316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d1f0b7c2e84'
+down_revision: Union[str, None] = '289c285a4127'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serves the (start, id) ordering and keyset comparison of the events list
+    op.create_index('ix_event_start_id', 'event', ['start', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_event_start_id', table_name='event')
@@ -0,0 +1,36 @@
+"""point file urls at download endpoint
+
+Revision ID: 8f2b6d4e1a97
+Revises: 5c1e7a9d3b24
+Create Date: 2026-10-18 17:32:40.918265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b6d4e1a97'
+down_revision: Union[str, None] = '5c1e7a9d3b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # /files was a public static mount, files are served by the authenticated endpoint now
+    op.execute(
+        "UPDATE uploadedfile "
+        "SET file_url = regexp_replace(file_url, '/files/.*$', '/api/v1/files/' || id::text) "
+        "WHERE file_url NOT LIKE '%/api/v1/files/%'"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE uploadedfile "
+        "SET file_url = regexp_replace(file_url, '/api/v1/files/.*$', '/files/' || CASE "
+        "WHEN sha256 IS NULL THEN filename "
+        "ELSE 'blobs/' || substr(sha256, 1, 2) || '/' || substr(sha256, 3, 2) || '/' || sha256 END)"
+    )
@@ -0,0 +1,27 @@
+"""add repeat_virtual to event
+
+Revision ID: 9fd340439bac
+Revises: 4681d8d13e89, b40ba0691516
+Create Date: 2026-10-18 10:12:41.532019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9fd340439bac'
+down_revision: Union[str, Sequence[str], None] = ('4681d8d13e89', 'b40ba0691516')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Series stored as a single recurrence rule row, expanded on read
+    op.add_column('event', sa.Column('repeat_virtual', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column('event', 'repeat_virtual')
@@ -0,0 +1,27 @@
+"""add message event_id timestamp index
+
+Revision ID: b7e3a1d95c20
+Revises: 6d1f0b7c2e84
+Create Date: 2026-10-18 13:05:14.862093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3a1d95c20'
+down_revision: Union[str, None] = '6d1f0b7c2e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Chat history is always read for one event ordered by timestamp
+    op.create_index('ix_message_event_id_timestamp', 'message', ['event_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_message_event_id_timestamp', table_name='message')
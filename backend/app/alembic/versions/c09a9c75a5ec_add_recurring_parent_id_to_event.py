@@ -0,0 +1,30 @@
+"""add recurring_parent_id to event
+
+Revision ID: c09a9c75a5ec
+Revises: 9fd340439bac
+Create Date: 2026-10-18 11:03:27.118640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c09a9c75a5ec'
+down_revision: Union[str, None] = '9fd340439bac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('event', sa.Column('recurring_parent_id', sa.Uuid(), nullable=True))
+    op.create_foreign_key('event_recurring_parent_id_fkey', 'event', 'event', ['recurring_parent_id'], ['id'], ondelete='SET NULL')
+    op.create_index(op.f('ix_event_recurring_parent_id'), 'event', ['recurring_parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_event_recurring_parent_id'), table_name='event')
+    op.drop_constraint('event_recurring_parent_id_fkey', 'event', type_='foreignkey')
+    op.drop_column('event', 'recurring_parent_id')
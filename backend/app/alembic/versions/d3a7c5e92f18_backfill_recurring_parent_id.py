@@ -0,0 +1,45 @@
+"""backfill recurring_parent_id
+
+Revision ID: d3a7c5e92f18
+Revises: 8f2b6d4e1a97
+Create Date: 2026-10-18 18:47:05.662310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7c5e92f18'
+down_revision: Union[str, None] = '8f2b6d4e1a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates written before recurring_parent_id existed get the series they were
+    # generated from: the latest earlier parent with the same title, step and duration,
+    # preferring one of the same creator. Duplicates without a match stay standalone
+    op.execute("""
+        UPDATE event AS duplicate
+        SET recurring_parent_id = (
+            SELECT parent.id
+            FROM event AS parent
+            WHERE parent.repeat_type = 'recurring_parent'
+              AND parent.title = duplicate.title
+              AND parent.repeat_step = duplicate.repeat_step
+              AND parent."end" - parent.start = duplicate."end" - duplicate.start
+              AND parent.start < duplicate.start
+            ORDER BY parent.creator_id = duplicate.creator_id DESC, parent.start DESC
+            LIMIT 1
+        )
+        WHERE duplicate.repeat_type = 'recurring_duplicate'
+          AND duplicate.recurring_parent_id IS NULL
+    """)
+
+
+def downgrade() -> None:
+    # The backfilled links can't be told apart from the ones written later
+    pass
@@ -0,0 +1,35 @@
+"""add notification unique index
+
+Revision ID: e4c2f9a07b13
+Revises: b7e3a1d95c20
+Create Date: 2026-10-18 13:42:37.215904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c2f9a07b13'
+down_revision: Union[str, None] = 'b7e3a1d95c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Workers generating at the same time could write the same reminder twice
+    op.execute("""
+        DELETE FROM notification a
+        USING notification b
+        WHERE a.user_id = b.user_id
+          AND a.event_id = b.event_id
+          AND a.send_at = b.send_at
+          AND a.id > b.id
+    """)
+    op.create_index('ix_notification_user_id_event_id_send_at', 'notification', ['user_id', 'event_id', 'send_at'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_user_id_event_id_send_at', table_name='notification')
@@ -1,3 +1,4 @@
+import uuid
 from collections.abc import Generator
 from typing import Annotated
 
@@ -16,6 +17,9 @@ from app.models import TokenPayload, User
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
+optional_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/login/access-token", auto_error=False
+)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -49,6 +53,37 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
+def get_download_user(
+    session: SessionDep,
+    file_id: uuid.UUID,
+    bearer: Annotated[str | None, Depends(optional_oauth2)],
+    token: str | None = None,
+) -> User:
+    """
+    The user of a signed file URL, else of the Authorization header.
+    Links, images and video players can't send the header, they get signed URLs.
+    """
+    if token is None:
+        if bearer is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return get_current_user(session, bearer)
+    user_id = security.verify_download_token(token, file_id)
+    user = session.get(User, user_id) if user_id is not None else None
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    return user
+
+
+DownloadUser = Annotated[User, Depends(get_download_user)]
+
+
 def get_current_active_superuser(current_user: CurrentUser) -> User:
     if not current_user.is_superuser:
         raise HTTPException(
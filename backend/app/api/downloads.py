@@ -0,0 +1,161 @@
+import mimetypes
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# Bytes read per chunk when the server can't send the file itself
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class FileRangeResponse(Response):
+    """
+    Sends a byte range of a file. Servers offering the ASGI zero-copy extension
+    send it with os.sendfile from the kernel page cache, otherwise the file is
+    read in chunks in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        status_code: int,
+        headers: dict[str, str],
+        media_type: str,
+    ) -> None:
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({**headers, "content-length": str(end - start)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        count = self.end - self.start
+        if scope["method"] == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.start,
+                    "count": count,
+                })
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.start)
+            remaining = count
+            while remaining:
+                chunk = await file.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": bool(remaining and chunk)})
+                if not chunk:
+                    break
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    def opaque(tag: str) -> str:
+        return tag.strip().removeprefix("W/")
+    return opaque(etag) in (opaque(tag) for tag in header.split(","))
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Returns the [start, end) of a single "bytes=" range, None if it can't be served
+    as one range. Raises ValueError for an unsatisfiable range.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    if not (first or last) or not all(value.isdigit() for value in (first, last) if value):
+        # Malformed ranges are ignored, the whole file is sent
+        return None
+    if not first:
+        # Suffix range, the last N bytes
+        if int(last) == 0:
+            raise ValueError(header)
+        return max(0, size - int(last)), size
+    start = int(first)
+    if last and int(last) < start:
+        # Invalid, not unsatisfiable: ignored like a malformed range
+        return None
+    if start >= size:
+        raise ValueError(header)
+    end = int(last) + 1 if last else size
+    return start, min(end, size)
+
+
+def file_download(
+    request: Request,
+    path: str,
+    filename: str,
+    cache_control: str,
+    etag: str | None = None,
+) -> Response:
+    """
+    Serves a file with validators and caching headers, answering conditional
+    requests with 304 and Range requests with 206 or 416.
+    filename is the name sent in Content-Disposition, percent-encoded.
+    Without an etag a weak one is derived from the file's size and mtime.
+    """
+    stat_result = os.stat(path)
+    size = stat_result.st_size
+    if etag is None:
+        etag = f'W/"{size:x}-{stat_result.st_mtime_ns:x}"'
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+    if _not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    headers["content-disposition"] = f"inline; filename*=UTF-8''{quote(filename, safe='%')}"
+
+    start, end, status_code = 0, size, 200
+    range_header = request.headers.get("range")
+    # A range only applies to the version the client has, If-Range says which one,
+    if_range = request.headers.get("if-range")
+    # which needs a strong validator
+    strong_validators = [headers["last-modified"]] + ([] if etag.startswith("W/") else [etag])
+    if range_header is not None and (if_range is None or if_range in strong_validators):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = 206
+            headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+
+    return FileRangeResponse(path, start, end, status_code, headers, media_type)
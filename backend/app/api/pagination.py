@@ -0,0 +1,93 @@
+import base64
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel import Session, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+T = TypeVar("T")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encodes keyset values of the last returned row into an opaque cursor."""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else str(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> tuple[Any, ...]:
+    """Decodes a cursor produced by encode_cursor back into typed keyset values."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value_type, value in zip(types, raw, strict=True)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def cursor_types(columns: Sequence[InstrumentedAttribute[Any]]) -> list[type]:
+    return [column.type.python_type for column in columns]
+
+
+def cursor_for(item: Any, columns: Sequence[InstrumentedAttribute[Any]]) -> str:
+    return encode_cursor([getattr(item, column.key) for column in columns])
+
+
+def keyset_filter(columns: Sequence[InstrumentedAttribute[Any]], values: Sequence[Any], descending: bool = False) -> Any:
+    """
+    Row value comparison (a, b) > (:a, :b), or < when paging in descending order,
+    served by an index on the same columns.
+    """
+    left = columns[0] if len(columns) == 1 else tuple_(*columns)
+    right = values[0] if len(columns) == 1 else tuple_(*values)
+    return left < right if descending else left > right
+
+
+def paginate(
+    session: Session,
+    query: SelectOfScalar[T],
+    columns: Sequence[InstrumentedAttribute[Any]],
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True,
+    descending: bool = False
+) -> tuple[list[T], int | None, str | None]:
+    """
+    Pages a query ordered by the given unique key columns, descending if requested.
+    Without a cursor the page is taken with offset, with a cursor the page starts
+    right after the row the cursor points at and skip is ignored.
+    Returns the page, the total count (None if not requested) and the cursor of the next page.
+    """
+    page_query = query.order_by(*(column.desc() if descending else column for column in columns))
+    count_over = include_count and cursor is None
+    if cursor is not None:
+        after = decode_cursor(cursor, cursor_types(columns))
+        page_query = page_query.where(keyset_filter(columns, after, descending))
+    else:
+        page_query = page_query.offset(skip)
+    if count_over:
+        # Total count arrives with the page through a window function
+        page_query = page_query.add_columns(func.count().over())
+
+    rows = session.execute(page_query.limit(limit)).all()
+    items = [row[0] for row in rows]
+
+    count = None
+    if count_over and rows:
+        count = rows[0][1]
+    elif count_over and skip == 0:
+        count = 0
+    elif include_count:
+        count = session.exec(select(func.count()).select_from(query.subquery())).one()
+
+    next_cursor = cursor_for(items[-1], columns) if items and len(items) == limit else None
+    return items, count, next_cursor
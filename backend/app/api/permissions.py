@@ -0,0 +1,111 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlmodel import Session, select
+
+from app.models import (
+    CategoryParticipant,
+    CategoryPermission,
+    EventParticipant,
+    EventPermission,
+)
+
+# Seconds a user's grants are served from memory. Invalidation only reaches
+# the current process, so this also bounds how long other workers may
+# keep serving grants that were changed elsewhere
+PERMISSION_CACHE_TTL = 5.0
+
+# Expired entries are swept once the cache holds more users than this
+PERMISSION_CACHE_SWEEP_SIZE = 1024
+
+
+@dataclass
+class UserGrants:
+    """Participant permissions of one user, keyed by event and category id."""
+    events: dict[uuid.UUID, EventPermission]
+    categories: dict[uuid.UUID, CategoryPermission]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+
+def load_grants(session: Session, user_id: uuid.UUID) -> UserGrants:
+    """Loads every event and category grant of the user with one query per table."""
+    events = session.exec(
+        select(EventParticipant.event_id, EventParticipant.permissions)
+        .where(EventParticipant.user_id == user_id)
+    ).all()
+    categories = session.exec(
+        select(CategoryParticipant.category_id, CategoryParticipant.permissions)
+        .where(CategoryParticipant.user_id == user_id)
+    ).all()
+    return UserGrants(events=dict(events), categories=dict(categories))
+
+
+class PermissionCache:
+    """
+    Memoizes grants per user for a short TTL, so repeated permission checks
+    within a request and across consecutive requests share one load.
+    Routes that change participants call invalidate for the affected users.
+    """
+
+    def __init__(self, ttl: float = PERMISSION_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._grants: dict[uuid.UUID, UserGrants] = {}
+        # Bumped by every invalidation, grants loaded before it are not stored
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def grants(self, session: Session, user_id: uuid.UUID) -> UserGrants:
+        with self._lock:
+            cached = self._grants.get(user_id)
+            if cached is not None and time.monotonic() - cached.loaded_at < self.ttl:
+                self.hits += 1
+                return cached
+            self.misses += 1
+            version = self._version
+
+        grants = load_grants(session, user_id)
+
+        with self._lock:
+            if version == self._version:
+                if len(self._grants) >= PERMISSION_CACHE_SWEEP_SIZE:
+                    self._sweep()
+                self._grants[user_id] = grants
+        return grants
+
+    def invalidate(self, *user_ids: uuid.UUID) -> None:
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+            for user_id in user_ids:
+                self._grants.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._grants.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "cached_users": len(self._grants),
+            }
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        for user_id in [
+            user_id for user_id, grants in self._grants.items()
+            if now - grants.loaded_at >= self.ttl
+        ]:
+            del self._grants[user_id]
+
+
+permission_cache = PermissionCache()
@@ -1,10 +1,12 @@
 import uuid
 from typing import Any, List
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, exists
 from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import CurrentUser, SessionDep
+from app.api.pagination import paginate
+from app.api.permissions import permission_cache
 from app.api.routes.utils import check_category_permissions
 from app.models import (Category, CategoryCreate, CategoryPublic, CategoriesPublic, CategoryUpdate,
                         Message,
@@ -17,48 +19,34 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 @router.get("/", response_model=CategoriesPublic)
 def read_categories(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True
 ) -> Any:
     """
     Retrieve categories.
+    Pass next_cursor of the previous page as cursor to page by keyset instead of skip.
     """
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Category)
-        count = session.exec(count_statement).one()
-        statement = select(Category).offset(skip).limit(limit)
-        categories = session.exec(statement).all()
-    else:
-        # Count categories where the user is either the owner or a participant
-        count_statement = (
-            select(func.count(func.distinct(Category.id)))
-            .select_from(Category)
-            .outerjoin(CategoryParticipant)
-            .where(
-                or_(
-                    Category.owner_id == current_user.id,
-                    CategoryParticipant.user_id == current_user.id
-                )
-            )
-        )
-        count = session.exec(count_statement).one()
-
-        # Select categories where the user is either the owner or a participant
-        statement = (
-            select(Category)
-            .distinct()
-            .outerjoin(CategoryParticipant)
-            .where(
-                or_(
-                    Category.owner_id == current_user.id,
+    query = select(Category)
+    if not current_user.is_superuser:
+        # Categories where the user is either the owner or a participant
+        query = query.where(
+            or_(
+                Category.owner_id == current_user.id,
+                exists().where(
+                    CategoryParticipant.category_id == Category.id,
                     CategoryParticipant.user_id == current_user.id
                 )
             )
-            .offset(skip)
-            .limit(limit)
         )
-        categories = session.exec(statement).all()
 
-    return CategoriesPublic(data=categories, count=count)
+    categories, count, next_cursor = paginate(
+        session, query, (Category.id,), skip, limit, cursor, include_count
+    )
+    return CategoriesPublic(data=categories, count=count, next_cursor=next_cursor)
 
 @router.get("/{id}", response_model=CategoryPublic)
 def read_category(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
@@ -129,6 +117,7 @@ def create_category(
                 session.add(category_participant)
 
         session.commit()
+        permission_cache.invalidate(*(participant.user_id for participant in category_in.participants or []))
         session.refresh(category)
         return category
 
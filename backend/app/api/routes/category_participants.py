@@ -4,6 +4,7 @@ from typing import List, Any
 import uuid
 
 from app.api.deps import CurrentUser, SessionDep
+from app.api.permissions import permission_cache
 from app.api.routes.utils import check_category_permissions
 from app.models import (
     CategoryParticipant,
@@ -90,6 +91,7 @@ def add_category_participant(
     session.add(participant)
     session.commit()
     session.refresh(participant)
+    permission_cache.invalidate(participant.user_id)
 
     return participant
 
@@ -127,6 +129,7 @@ def update_category_participant(
     session.add(participant)
     session.commit()
     session.refresh(participant)
+    permission_cache.invalidate(participant.user_id)
     
     return participant
 
@@ -159,5 +162,6 @@ def remove_category_participant(
     # Delete the participant from the category
     session.delete(participant)
     session.commit()
+    permission_cache.invalidate(user_id)
 
     return Message(message="Participant removed successfully from category")
@@ -4,6 +4,9 @@ from typing import List, Any
 import uuid
 
 from app.api.deps import CurrentUser, SessionDep
+from app.api.permissions import permission_cache
+from app.notifications.events_check import discard_pending_notifications
+from app.websockets.notifier import notification_scheduler
 from app.api.routes.utils import check_event_permissions
 from app.models import (
     EventParticipant,
@@ -93,6 +96,8 @@ def add_event_participant(
     session.add(participant)
     session.commit()
     session.refresh(participant)
+    permission_cache.invalidate(participant.user_id)
+    notification_scheduler.reload()
 
     return participant
 
@@ -133,6 +138,8 @@ def update_event_participant(
     session.add(participant)
     session.commit()
     session.refresh(participant)
+    permission_cache.invalidate(participant.user_id)
+    notification_scheduler.reload()
     
     return participant
 
@@ -165,8 +172,11 @@ def remove_event_participant(
     if not participant:
         raise HTTPException(status_code=404, detail="Participant not found")
 
-    # Delete the participant from the event
+    # Delete the participant from the event, with the reminders they were still due
     session.delete(participant)
+    discard_pending_notifications(session, event_id, user_id)
     session.commit()
+    permission_cache.invalidate(user_id)
+    notification_scheduler.reload()
 
     return Message(message="Participant removed successfully from event")
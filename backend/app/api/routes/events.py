@@ -1,26 +1,64 @@
 import uuid
-from typing import Any, List, Optional
-from sqlalchemy import or_, and_, func
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select, SQLModel
+from typing import Any, List
+from sqlalchemy import and_
+from fastapi import APIRouter, HTTPException, Query
+from sqlmodel import Field, select, SQLModel
 from datetime import datetime, timedelta
 
 from app.api.deps import CurrentUser, SessionDep
-from app.api.routes.utils import check_category_permissions, check_event_permissions
+from app.api.pagination import keyset_filter, paginate
+from app.api.permissions import permission_cache
+from app.api.routes.utils import (
+    check_category_permissions, check_event_permissions, event_visibility_clause
+)
+from app.chat.store import message_writer
 from app.models import (
     Event, EventCreate, EventPublic, EventsPublic, EventUpdate, Message,
-    EventParticipant, EventPermission, EventParticipantsPublic,
-    CategoryParticipant, CategoryPermission, EventCategoryLink, User, Category,
+    EventParticipant, EventPermission,
+    CategoryParticipant, CategoryPermission, EventCategoryLink, User,
     MessagesPublic, RepeatType
 )
+from app.recurrence.series import (
+    expand_events, get_repeat_delta, iter_occurrences, overlap_clause,
+    paginate_with_series, window_clause
+)
+from app.recurrence.bulk import SeriesRewriteStats, bulk_create_occurrences, delete_occurrences
+from app.scheduling.availability import busy_buckets, find_free_slots
+from app.notifications.events_check import discard_pending_notifications
+from app.websockets.notifier import notification_scheduler
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+MAX_MESSAGES_PAGE = 500
+
+MAX_AVAILABLE_SLOTS = 200
+
 class AvailableTimeRequest(SQLModel):
     duration_minutes: int
     participant_ids: List[uuid.UUID]
     start_date: datetime
     end_date: datetime
+    # Distance between two proposed start times inside a free gap
+    granularity_minutes: int = Field(default=1, ge=1)
+
+MAX_AVAILABILITY_BUCKETS = 10000
+
+class AvailabilityMatrixRequest(SQLModel):
+    participant_ids: List[uuid.UUID]
+    start_date: datetime
+    end_date: datetime
+    bucket_minutes: int = Field(default=30, ge=1)
+    include_ids: bool = True
+
+class AvailabilityBucket(SQLModel):
+    start: datetime
+    busy_count: int
+    busy_participant_ids: List[uuid.UUID] | None = None
+
+class AvailabilityMatrix(SQLModel):
+    bucket_minutes: int
+    participant_count: int
+    buckets: List[AvailabilityBucket]
 
 @router.get("/", response_model=EventsPublic)
 def read_events(
@@ -30,10 +68,13 @@ def read_events(
     limit: int = 100,
     start_date: datetime | None = None,
     end_date: datetime | None = None,
-    user_id: uuid.UUID | None = None
+    user_id: uuid.UUID | None = None,
+    cursor: str | None = None,
+    include_count: bool = True
 ) -> Any:
     """
-    Retrieve events.
+    Retrieve events ordered by start time.
+    Pass next_cursor of the previous page as cursor to page by keyset instead of skip.
     """
     # # Check dates in timezone-naive if them are provided
     if start_date:
@@ -70,67 +111,20 @@ def read_events(
         if user_id is not None:
             query = query.where(Event.creator_id == user_id)
         
-        # Filter by data
-        if start_date is not None:
-            query = query.where(Event.start >= start_date)
-        if end_date is not None:
-            query = query.where(Event.end <= end_date)
-            
-        # Receiving whole count
-        count_statement = select(func.count()).select_from(query.subquery())
-        count = session.exec(count_statement).one()
-        
-        # Add paging
-        statement = query.offset(skip).limit(limit)
-        events = session.exec(statement).all()
+        # Filter by data, count and page with expanded virtual series
+        events, count, next_cursor = paginate_with_series(
+            session, query, start_date, end_date, skip, limit, cursor, include_count
+        )
     else:
-        # Receive events where user participates
-        user_participations = session.exec(
-            select(EventParticipant).where(EventParticipant.user_id == current_user.id)
-        ).all()
-        user_event_ids = {ep.event_id for ep in user_participations}
-
-        # Receive categoires to which user have access
-        accessible_categories = session.exec(
-            select(Category.id).join(CategoryParticipant).where(
-                or_(
-                    Category.owner_id == current_user.id,
-                    CategoryParticipant.user_id == current_user.id
-                )
-            )
-        ).all()
-
-        # Receive events via allowed categories
-        category_events = session.exec(
-            select(Event.id)
-            .join(EventCategoryLink)
-            .where(EventCategoryLink.category_id.in_(accessible_categories))
-        ).all()
-        category_event_ids = {event.id for event in category_events}
-
-        # Unite ids of events
-        all_event_ids = list(user_event_ids | category_event_ids)
-        if not all_event_ids:
-            return EventsPublic(data=[], count=0)
-
-        # Basic query filtered on event ids
-        query = select(Event).where(Event.id.in_(all_event_ids))
+        # Events where user participates or which are in accessible categories
+        query = select(Event).where(event_visibility_clause(current_user.id))
         
-        # Ddate filter
-        if start_date is not None:
-            query = query.where(Event.start >= start_date)
-        if end_date is not None:
-            query = query.where(Event.end <= end_date)
-            
-        # Receiving whole count
-        count_statement = select(func.count()).select_from(query.subquery())
-        count = session.exec(count_statement).one()
-        
-        # Adding paging
-        statement = query.offset(skip).limit(limit)
-        events = session.exec(statement).all()
+        # Date filter, count and paging with expanded virtual series
+        events, count, next_cursor = paginate_with_series(
+            session, query, start_date, end_date, skip, limit, cursor, include_count
+        )
 
-    return EventsPublic(data=events, count=count)
+    return EventsPublic(data=events, count=count, next_cursor=next_cursor)
 
 @router.get("/permissions-and-participants")
 def get_events_with_permissions(
@@ -211,13 +205,10 @@ def get_events_with_permissions(
         else:
             query = query.where(Event.creator_id == current_user.id)
 
-    # Date filtering
-    if start_date is not None:
-        query = query.where(Event.start >= start_date)
-    if end_date is not None:
-        query = query.where(Event.end <= end_date)
+    # Date filtering, virtual series are expanded into occurrences
+    query = query.where(window_clause(start_date, end_date))
 
-    events = session.exec(query).all()
+    events = expand_events(session.exec(query).all(), start_date, end_date)
 
     # Preload of relations: EventParticipant + EventCategoryLink + User
     all_event_participants = session.exec(
@@ -256,6 +247,7 @@ def get_events_with_permissions(
             "creator_id": event.creator_id,
             "is_finished": event.is_finished,
             "max_repeats_count": event.max_repeats_count,
+            "repeat_virtual": event.repeat_virtual,
             "permissions": permissions,
             "eventcategories": [
                 {"category_id": cid} for cid in event_to_categories.get(event.id, [])
@@ -298,16 +290,23 @@ def create_recurring_events(
     session: SessionDep,
     base_event: Event,
     event_in: EventCreate | EventUpdate,
-    current_user: CurrentUser
-) -> List[Event]:
+    current_user: CurrentUser,
+    stats: SeriesRewriteStats | None = None
+) -> List[uuid.UUID]:
     """
     Creates recurring events based on the base event.
     Events are created based on either max_repeats_count or repeat_until,
     whichever is more restrictive.
+    Occurrences, their participants and category links are written in bulk.
+    Returns ids of the created events.
     """
     if event_in.repeat_type == RepeatType.none or event_in.repeat_step == 0:
         return []
 
+    # Virtual series are expanded on read, nothing to materialize
+    if base_event.repeat_virtual:
+        return []
+
     # Convert dates to timezone-naive
     base_start = base_event.start.replace(tzinfo=None) if base_event.start.tzinfo else base_event.start
     base_end = base_event.end.replace(tzinfo=None) if base_event.end.tzinfo else base_event.end
@@ -317,23 +316,14 @@ def create_recurring_events(
     duration = base_end - base_start
     
     # Determine step based on repeat type
-    if event_in.repeat_type == RepeatType.hourly:
-        step = timedelta(hours=event_in.repeat_step)
-    elif event_in.repeat_type == RepeatType.daily:
-        step = timedelta(days=event_in.repeat_step)
-    elif event_in.repeat_type == RepeatType.weekly:
-        step = timedelta(weeks=event_in.repeat_step)
-    elif event_in.repeat_type == RepeatType.monthly:
-        step = timedelta(days=30 * event_in.repeat_step)
-    elif event_in.repeat_type == RepeatType.yearly:
-        step = timedelta(days=365 * event_in.repeat_step)
-    else:
+    step = get_repeat_delta(event_in.repeat_type, event_in.repeat_step)
+    if step is None:
         return []
 
-    recurring_events = []
+    occurrences = []
     current_start = base_start + step
     current_end = base_end + step
-    repeats_count = 0
+    max_repeats_count = event_in.max_repeats_count or 0
 
     # Maximum future date for event creation (10 years ahead)
     max_future_date = datetime.now() + timedelta(days=3650)
@@ -350,10 +340,10 @@ def create_recurring_events(
     elif isinstance(event_in, EventUpdate) and hasattr(event_in, 'category_id') and event_in.category_id is not None:
         category_id = event_in.category_id
 
-    # Create recurring events
+    # Collect occurrence times
     while True:
         # Check if we've reached the maximum number of repeats
-        if event_in.max_repeats_count > 0 and repeats_count >= event_in.max_repeats_count:
+        if max_repeats_count > 0 and len(occurrences) >= max_repeats_count:
             break
             
         # Check if we've reached the repeat_until date
@@ -364,46 +354,26 @@ def create_recurring_events(
         if current_start > max_future_date:
             break
 
-        # Create new event
-        new_event = Event(
-            title=base_event.title,
-            description=base_event.description,
-            start=current_start,
-            end=current_end,
-            type=base_event.type,
-            repeat_type=RepeatType.recurring_duplicate,  # Mark as duplicate
-            repeat_step=event_in.repeat_step,
-            is_private=base_event.is_private,
-            priority=base_event.priority,
-            creator_id=current_user.id
-        )
-        session.add(new_event)
-        session.flush()
-
-        # Create category link if category exists
-        if category_id:
-            link = EventCategoryLink(event_id=new_event.id, category_id=category_id)
-            session.add(link)
-
-        # Copy participants from base event
-        for participant in base_event.participants:
-            new_participant = EventParticipant(
-                event_id=new_event.id,
-                user_id=participant.user_id,
-                is_creator=participant.is_creator,
-                is_listener=participant.is_listener,
-                permissions=participant.permissions
-            )
-            session.add(new_participant)
-
-        recurring_events.append(new_event)
-        repeats_count += 1
+        occurrences.append((current_start, current_end))
 
         # Update time for next event
         current_start += step
         current_end += step
 
-    return recurring_events
+    if not occurrences:
+        return []
+
+    # Create events, participant copies and category links in bulk
+    return bulk_create_occurrences(
+        session,
+        base_event,
+        occurrences,
+        base_event.participants,
+        category_id,
+        current_user.id,
+        event_in.repeat_step,
+        stats
+    )
 
 @router.post("/", response_model=EventPublic)
 def create_event(
@@ -453,8 +423,9 @@ def create_event(
         if repeat_until:
             event_data["repeat_until"] = repeat_until
 
-        # If this is a recurring event, mark it as parent
-        if event_in.repeat_type != RepeatType.none and event_in.repeat_step > 0:
+        # If this is a recurring event, mark it as parent.
+        # Virtual series keep their repeat type as the recurrence rule
+        if event_in.repeat_type != RepeatType.none and event_in.repeat_step > 0 and not event_in.repeat_virtual:
             event_data["repeat_type"] = RepeatType.recurring_parent
 
         event = Event.model_validate(event_data, update={"creator_id": current_user.id})
@@ -503,6 +474,8 @@ def create_event(
         recurring_events = create_recurring_events(session, event, event_in, current_user)
 
         session.commit()
+        permission_cache.invalidate(*(participant.user_id for participant in event_in.participants or []))
+        notification_scheduler.reload()
         session.refresh(event)
         return event
 
@@ -557,8 +530,10 @@ def update_event(
     end_date = event_in.end.replace(tzinfo=None) if event_in.end and event_in.end.tzinfo else event_in.end
     repeat_until = event_in.repeat_until.replace(tzinfo=None) if event_in.repeat_until and event_in.repeat_until.tzinfo else event_in.repeat_until
 
-    # Validate time range
-    if start_date and end_date and start_date >= end_date:
+    # Validate the time range the event ends up with, either bound may be kept
+    new_start = start_date or event.start.replace(tzinfo=None)
+    new_end = end_date or event.end.replace(tzinfo=None)
+    if new_start >= new_end:
         raise HTTPException(
             status_code=400,
             detail="Event start time must be before end time"
@@ -586,40 +561,23 @@ def update_event(
 
     try:
         # If this is a recurring parent event and we're changing its recurrence settings,
-        # delete all existing duplicate events
-        if event.repeat_type == RepeatType.recurring_parent and (
+        # delete all existing duplicate events in one statement per table
+        series_stats = None
+        # Users whose grants change when the occurrences are rewritten
+        series_user_ids = {participant.user_id for participant in event.participants}
+        if event.repeat_type == RepeatType.recurring_parent and not event.repeat_virtual and (
             event_in.repeat_type or 
             event_in.repeat_step or 
             event_in.repeat_until or 
             event_in.max_repeats_count
         ):
-            # Find and delete all duplicate events
-            duplicate_events = session.exec(
-                select(Event).where(
-                    and_(
-                        Event.repeat_type == RepeatType.recurring_duplicate,
-                        Event.start > event.start  # Only delete future duplicates
-                    )
-                )
-            ).all()
-            
-            for duplicate in duplicate_events:
-                # Delete related participants
-                participants = session.exec(
-                    select(EventParticipant).where(EventParticipant.event_id == duplicate.id)
-                ).all()
-                for participant in participants:
-                    session.delete(participant)
-                
-                # Delete related category links
-                category_links = session.exec(
-                    select(EventCategoryLink).where(EventCategoryLink.event_id == duplicate.id)
-                ).all()
-                for link in category_links:
-                    session.delete(link)
-                
-                # Delete the duplicate event
-                session.delete(duplicate)
+            series_user_ids.update(session.exec(
+                select(EventParticipant.user_id)
+                .join(Event, Event.id == EventParticipant.event_id)
+                .where(Event.recurring_parent_id == event.id)
+                .distinct()
+            ).all())
+            series_stats = delete_occurrences(session, event)
 
         # Update event data
         event_data = event_in.model_dump(exclude_unset=True)
@@ -630,8 +588,9 @@ def update_event(
         if repeat_until:
             event_data["repeat_until"] = repeat_until
 
-        # If this is a recurring event, mark it as parent
-        if event_in.repeat_type and event_in.repeat_type != RepeatType.none and event_in.repeat_step and event_in.repeat_step > 0:
+        # If this is a recurring event, mark it as parent.
+        # Virtual series keep their repeat type as the recurrence rule
+        if event_in.repeat_type and event_in.repeat_type != RepeatType.none and event_in.repeat_step and event_in.repeat_step > 0 and not event.repeat_virtual:
             event_data["repeat_type"] = RepeatType.recurring_parent
 
         # Remove category_id from event_data as it's not a field in Event model
@@ -651,11 +610,21 @@ def update_event(
             session.add(new_link)
 
         # If event becomes recurring or its recurrence settings changed, create recurring events
+        created_ids = []
         if event_in.repeat_type and event_in.repeat_type != RepeatType.none and event_in.repeat_step and event_in.repeat_step > 0:
             # Create recurring events
-            recurring_events = create_recurring_events(session, event, event_in, current_user)
+            created_ids = create_recurring_events(session, event, event_in, current_user, series_stats)
+
+        # Reminders are regenerated from the updated start time
+        discard_pending_notifications(session, event.id)
 
         session.commit()
+        if series_stats is not None:
+            series_stats.finish()
+        if series_stats is not None or created_ids:
+            # Participants lost grants on the removed occurrences and got them on the new ones
+            permission_cache.invalidate(*series_user_ids)
+        notification_scheduler.reload()
         session.refresh(event)
         return event
 
@@ -692,12 +661,50 @@ def delete_event(
     for participant in participants:
         session.delete(participant)
 
+    discard_pending_notifications(session, id)
+
     # Now delete the event
     session.delete(event)
     session.commit()
+    notification_scheduler.reload()
     
     return Message(message="Event deleted successfully")
 
+def get_busy_ranges(
+    session: SessionDep,
+    participant_ids: List[uuid.UUID],
+    start_date: datetime,
+    end_date: datetime
+) -> dict[uuid.UUID, List[tuple[datetime, datetime]]]:
+    """
+    Returns busy time ranges of every participant clipped to the given time range.
+    Virtual series are expanded into occurrences.
+    """
+    # Get all events for the participants in the given time range
+    participant_events = session.exec(
+        select(EventParticipant.user_id, Event)
+        .join(Event, EventParticipant.event_id == Event.id)
+        .where(
+            and_(
+                EventParticipant.user_id.in_(participant_ids),
+                overlap_clause(start_date, end_date)
+            )
+        )
+    ).all()
+
+    busy_by_participant: dict[uuid.UUID, List[tuple[datetime, datetime]]] = {
+        participant_id: [] for participant_id in participant_ids
+    }
+    for participant_id, event in participant_events:
+        for _, event_start, event_end in iter_occurrences(event, start_date, end_date):
+            # Ensure we only consider events within our time range
+            event_start = max(event_start, start_date)
+            event_end = min(event_end, end_date)
+
+            busy_by_participant[participant_id].append((event_start, event_end))
+
+    return busy_by_participant
+
 @router.post("/find-available-time", response_model=List[datetime])
 def find_available_time(
     *,
@@ -707,7 +714,8 @@ def find_available_time(
 ) -> Any:
     """
     Find available time slots for event participants.
-    Returns a list of possible start times where all participants are available.
+    Returns a list of possible start times where all participants are available,
+    proposed every granularity_minutes inside each free gap.
     Maximum 200 slots will be returned.
     """
     # Convert dates to naive if they are timezone-aware
@@ -717,76 +725,87 @@ def find_available_time(
     # Add current user to the list of participants if not already included
     all_participant_ids = list(set([*request.participant_ids, current_user.id]))
 
-    # Get all events for the participants in the given time range
-    participant_events = session.exec(
-        select(Event)
-        .join(EventParticipant)
-        .where(
-            and_(
-                EventParticipant.user_id.in_(all_participant_ids),
-                or_(
-                    and_(Event.start >= start_date, Event.start < end_date),
-                    and_(Event.end > start_date, Event.end <= end_date),
-                    and_(Event.start <= start_date, Event.end >= end_date)
-                )
-            )
+    # Get busy time ranges of all participants in the given time range
+    busy_by_participant = get_busy_ranges(session, all_participant_ids, start_date, end_date)
+    busy_ranges = [busy for ranges in busy_by_participant.values() for busy in ranges]
+
+    # Merge busy ranges and emit free slots from the gaps between them
+    return find_free_slots(
+        busy_ranges,
+        start_date,
+        end_date,
+        duration=timedelta(minutes=request.duration_minutes),
+        granularity=timedelta(minutes=request.granularity_minutes),
+        max_slots=MAX_AVAILABLE_SLOTS
+    )
+
+@router.post("/availability-matrix", response_model=AvailabilityMatrix)
+def get_availability_matrix(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    request: AvailabilityMatrixRequest
+) -> Any:
+    """
+    Get busy participants per time bucket for an availability heatmap.
+    Each bucket reports how many participants (and which) are busy during it.
+    """
+    # Convert dates to naive if they are timezone-aware
+    start_date = request.start_date.replace(tzinfo=None) if request.start_date.tzinfo else request.start_date
+    end_date = request.end_date.replace(tzinfo=None) if request.end_date.tzinfo else request.end_date
+
+    if start_date >= end_date:
+        raise HTTPException(
+            status_code=400,
+            detail="start_date must be before end_date"
         )
-    ).all()
 
-    # Create a list of busy time ranges
-    busy_ranges = []
-    for event in participant_events:
-        # Convert event times to naive if they are timezone-aware
-        event_start = event.start.replace(tzinfo=None) if event.start.tzinfo else event.start
-        event_end = event.end.replace(tzinfo=None) if event.end.tzinfo else event.end
-        
-        # Ensure we only consider events within our time range
-        event_start = max(event_start, start_date)
-        event_end = min(event_end, end_date)
-        
-        busy_ranges.append((event_start, event_end))
-
-    # Sort busy ranges by start time
-    busy_ranges.sort(key=lambda x: x[0])
-
-    # Find available slots
-    available_slots = []
-    current_time = start_date
-    MAX_SLOTS = 200
-
-    while (current_time + timedelta(minutes=request.duration_minutes) <= end_date and 
-           len(available_slots) < MAX_SLOTS):
-        # Check if current time slot overlaps with any busy range
-        is_available = True
-        for busy_start, busy_end in busy_ranges:
-            # If current slot ends before busy period starts or starts after busy period ends
-            if (current_time + timedelta(minutes=request.duration_minutes) <= busy_start or 
-                current_time >= busy_end):
-                continue
-            else:
-                is_available = False
-                # Skip to the end of this busy period
-                current_time = busy_end
-                break
-
-        if is_available:
-            available_slots.append(current_time)
-            # Move to next minute
-            current_time += timedelta(minutes=1)
-        else:
-            # We already moved current_time in the loop above
-            continue
+    bucket = timedelta(minutes=request.bucket_minutes)
+    if (end_date - start_date) / bucket > MAX_AVAILABILITY_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many buckets requested, maximum is {MAX_AVAILABILITY_BUCKETS}"
+        )
 
-    return available_slots
+    # Add current user to the list of participants if not already included
+    all_participant_ids = list(set([*request.participant_ids, current_user.id]))
+
+    busy_by_participant = get_busy_ranges(session, all_participant_ids, start_date, end_date)
+    busy = busy_buckets(busy_by_participant, start_date, end_date, bucket)
+
+    return AvailabilityMatrix(
+        bucket_minutes=request.bucket_minutes,
+        participant_count=len(all_participant_ids),
+        buckets=[
+            AvailabilityBucket(
+                start=start_date + bucket * index,
+                busy_count=len(participant_ids),
+                busy_participant_ids=participant_ids if request.include_ids else None
+            )
+            for index, participant_ids in enumerate(busy)
+        ]
+    )
 
 @router.get("/{event_id}/messages", response_model=MessagesPublic)
 def get_event_messages(
     event_id: uuid.UUID,
     session: SessionDep,
-    current_user: CurrentUser  
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = Query(default=100, ge=1, le=MAX_MESSAGES_PAGE),
+    cursor: str | None = None,
+    include_count: bool = True,
+    before: datetime | None = None,
+    after: datetime | None = None,
+    since_id: uuid.UUID | None = None
 ) -> Any:
     """
-    Retrieve all messages for a specific event based on the event ID.
+    Retrieve messages for a specific event based on the event ID, oldest first.
+    Pass next_cursor of the previous page as cursor to page by keyset instead of skip.
+    - before: the latest page of messages sent before this moment, for scrolling back;
+      next_cursor then continues with the older messages
+    - after: messages sent after this moment
+    - since_id: messages sent after the message with this id, for reconnecting clients
     """
     # Retrieve the event from the database
     event = session.get(Event, event_id)
@@ -801,7 +820,31 @@ def get_event_messages(
     ).first()
     if not is_participant:
         raise HTTPException(status_code=403, detail="User  is not a participant in this event.")
-    # Query to get all messages for the specified event
+    # Query to get messages for the specified event
     statement = select(Message).where(Message.event_id == event_id)
-    messages = session.exec(statement).all()
-    return MessagesPublic(data=messages, count=len(messages))
+    if since_id is not None:
+        # Recent messages may still wait in the write-behind buffer
+        last_seen = message_writer.find(since_id) or session.get(Message, since_id)
+        if not last_seen or last_seen.event_id != event_id:
+            raise HTTPException(status_code=404, detail="Message not found.")
+        statement = statement.where(
+            keyset_filter((Message.timestamp, Message.id), (last_seen.timestamp, last_seen.id))
+        )
+    if after is not None:
+        after = after.replace(tzinfo=None) if after.tzinfo else after
+        statement = statement.where(Message.timestamp > after)
+
+    if before is not None:
+        before = before.replace(tzinfo=None) if before.tzinfo else before
+        statement = statement.where(Message.timestamp < before)
+        # Newest messages first so the limit keeps the latest ones and the cursor
+        # continues with older ones, each page is returned oldest first
+        messages, count, next_cursor = paginate(
+            session, statement, (Message.timestamp, Message.id), skip, limit, cursor, include_count, descending=True
+        )
+        return MessagesPublic(data=list(reversed(messages)), count=count, next_cursor=next_cursor)
+
+    messages, count, next_cursor = paginate(
+        session, statement, (Message.timestamp, Message.id), skip, limit, cursor, include_count
+    )
+    return MessagesPublic(data=messages, count=count, next_cursor=next_cursor)
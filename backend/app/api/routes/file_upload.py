@@ -1,48 +1,169 @@
 import os
-import shutil
 import uuid
 import logging
+from datetime import timedelta
 from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi import status
 from sqlmodel import select
 from app.websockets.manager import manager
-from app.api.deps import CurrentUser , SessionDep
+from app.api.deps import CurrentUser , DownloadUser, SessionDep
+from app.api.downloads import file_download
+from app.api.uploads import UPLOAD_REQUEST_BODY, stream_body, stream_upload
+from app.core.config import settings
+from app.core.security import create_download_token
+from app.files.resumable import (
+    MAX_CHUNK_SIZE,
+    ResumableUpload,
+    assemble_upload,
+    chunk_allowance,
+    chunk_directory,
+    claim_upload,
+    commit_chunk,
+    create_upload,
+    load_upload,
+    missing_ranges,
+    release_upload,
+    remove_upload,
+)
+from app.files.previews import preview_pipeline
+from app.files.storage import blob_store, count_references, lock_blob
 from app.chat.permissions import is_user_participant_of_event
 from urllib.parse import quote
-from ...models import UploadResponse, UploadedFile, EventParticipant, EventPermission
+from ...models import (
+    UploadResponse, UploadedFile, UploadedFilePublic, EventParticipant, EventPermission,
+    ResumableUploadCreate, ResumableUploadStatus
+)
 
 router = APIRouter()
 
-UPLOAD_DIRECTORY = "uploaded_files"
+# Also holds files uploaded before the blob store, flat under their filename
+UPLOAD_DIRECTORY = settings.UPLOAD_DIRECTORY
 os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 
+# Blobs never change, a cached copy stays valid. Files from before the blob store
+# are kept under their filename and revalidated
+BLOB_CACHE_CONTROL = "private, max-age=31536000, immutable"
+LEGACY_FILE_CACHE_CONTROL = "private, no-cache"
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@router.get("/events/{event_id}/files", response_model=List[UploadedFile], tags=["File Upload"])
+@router.get("/events/{event_id}/files", response_model=List[UploadedFilePublic], tags=["File Upload"])
 def get_event_files(
+    request: Request,
     event_id: uuid.UUID,
-    db: SessionDep
+    db: SessionDep,
+    user: CurrentUser
 ):
+    if not is_user_participant_of_event(db, event_id, user.id):
+        raise HTTPException(status_code=403, detail="User  is not a participant of the event.")
     # Query to get all files for the specified event
     files = db.exec(
         select(UploadedFile).where(UploadedFile.event_id == event_id)
     ).all()
     if not files:
         raise HTTPException(status_code=404, detail="No files found for this event.")
-    return files
 
-@router.post("/uploadfile/", response_model=UploadResponse, status_code=status.HTTP_201_CREATED, tags=["File Upload"])
+    # Signed URLs, so links, images and video players reach the files without the Authorization header
+    base_url = f"{request.url.scheme}://{request.headers['host']}{settings.API_V1_STR}/files"
+    expires_delta = timedelta(minutes=settings.DOWNLOAD_TOKEN_EXPIRE_MINUTES)
+    public_files = []
+    for file in files:
+        query = f"?token={create_download_token(file.id, user.id, expires_delta)}"
+        has_preview = file.sha256 is not None and os.path.exists(blob_store.preview_path(file.sha256))
+        public_files.append(UploadedFilePublic.model_validate(
+            file,
+            update={
+                "file_url": f"{base_url}/{file.id}{query}",
+                "preview_url": f"{base_url}/{file.id}/preview{query}" if has_preview else None,
+            },
+        ))
+    return public_files
+
+@router.api_route("/files/{file_id}", methods=["GET", "HEAD"], tags=["File Upload"])
+def download_file(
+    request: Request,
+    file_id: uuid.UUID,
+    db: SessionDep,
+    user: DownloadUser
+):
+    """Serves an uploaded file to participants of its event, with Range and conditional request support."""
+    uploaded_file = db.get(UploadedFile, file_id)
+    if not uploaded_file:
+        raise HTTPException(status_code=404, detail="File not found.")
+    if not is_user_participant_of_event(db, uploaded_file.event_id, user.id):
+        raise HTTPException(status_code=403, detail="User  is not a participant of the event.")
+
+    if uploaded_file.sha256 is not None:
+        # The content hash is a strong validator
+        path = blob_store.path(uploaded_file.sha256)
+        etag = f'"{uploaded_file.sha256}"'
+        cache_control = BLOB_CACHE_CONTROL
+    else:
+        path = os.path.join(UPLOAD_DIRECTORY, uploaded_file.filename)
+        etag = None
+        cache_control = LEGACY_FILE_CACHE_CONTROL
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found.")
+
+    return file_download(request, path, uploaded_file.filename, cache_control, etag)
+
+@router.get("/files/{file_id}/preview", tags=["File Upload"])
+def download_file_preview(
+    request: Request,
+    file_id: uuid.UUID,
+    db: SessionDep,
+    user: DownloadUser
+):
+    """Serves the preview of an uploaded image or PDF, 404 until it is rendered."""
+    uploaded_file = db.get(UploadedFile, file_id)
+    if not uploaded_file:
+        raise HTTPException(status_code=404, detail="File not found.")
+    if not is_user_participant_of_event(db, uploaded_file.event_id, user.id):
+        raise HTTPException(status_code=403, detail="User  is not a participant of the event.")
+
+    path = blob_store.preview_path(uploaded_file.sha256) if uploaded_file.sha256 else None
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Preview not found.")
+
+    filename = os.path.splitext(uploaded_file.filename)[0] + ".preview.jpg"
+    return file_download(request, path, filename, BLOB_CACHE_CONTROL, f'"{uploaded_file.sha256}-preview"')
+
+@router.post(
+    "/uploadfile/",
+    response_model=UploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    tags=["File Upload"],
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY},
+)
 async def upload_file(
     request: Request,
     db: SessionDep,
     event_id: uuid.UUID,
-    user: CurrentUser ,
-    file: UploadFile = File(...)
+    user: CurrentUser
 ):
     # Check user participation and permissions
+    await run_in_threadpool(check_upload_permission, db, event_id, user)
+
+    # Stream the file part to disk, the body is read after the permission check
+    upload = await stream_upload(request, blob_store.temp_directory)
+    try:
+        # Sanitize filename
+        sanitized_filename = quote(upload.filename)
+        await run_in_threadpool(check_filename_available, db, event_id, sanitized_filename)
+    except HTTPException:
+        upload.discard()
+        raise
+
+    return await save_uploaded_file(
+        request, db, user, event_id, sanitized_filename, upload.path, upload.sha256, upload.size
+    )
+
+
+def check_upload_permission(db: SessionDep, event_id: uuid.UUID, user: CurrentUser) -> None:
     participant = db.exec(
         select(EventParticipant).where(
             EventParticipant.event_id == event_id,
@@ -52,47 +173,83 @@ async def upload_file(
     if not participant or participant.permissions in [EventPermission.VIEW]:
         raise HTTPException(status_code=403, detail="User  does not have permission to upload files to this event.")
 
-    # Sanitize filename
-    sanitized_filename = quote(file.filename)
 
+def check_filename_available(db: SessionDep, event_id: uuid.UUID, filename: str) -> None:
     # Check if a file with the same name already exists for the event
     existing_file = db.exec(
         select(UploadedFile).where(
-            UploadedFile.filename == sanitized_filename,
+            UploadedFile.filename == filename,
             UploadedFile.event_id == event_id
         )
     ).first()
     if existing_file:
         raise HTTPException(status_code=400, detail="A file with this name already exists for this event.")
 
-    file_location = os.path.join(UPLOAD_DIRECTORY, sanitized_filename)
 
+def store_uploaded_file(
+    db: SessionDep,
+    user: CurrentUser,
+    event_id: uuid.UUID,
+    filename: str,
+    temp_path: str,
+    sha256: str,
+    size: int,
+    files_url: str
+) -> UploadedFile:
+    """Moves a received file into the blob store and records it. Blocking, runs in the threadpool."""
+    # Identical content is stored once, the new row is one more reference to it
+    lock_blob(db, sha256)
     try:
-        # Save file to disk
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        logger.info(f"File {sanitized_filename} uploaded successfully.")
+        if blob_store.add(temp_path, sha256):
+            logger.info(f"File {filename} stored as blob {sha256} ({size} bytes).")
+        else:
+            logger.info(f"File {filename} matches stored blob {sha256}.")
     except Exception as e:
-        logger.error(f"Error saving file {sanitized_filename}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        db.rollback()
+        logger.error(f"Error saving file {filename}: {e}")
         raise HTTPException(status_code=500, detail="Error saving file")
 
-    # Construct the full URL
-    file_url = f"{request.url.scheme}://{request.headers['host']}/files/{sanitized_filename}"
-
-    # Save file metadata to the database
+    # Save file metadata to the database, which also releases the blob lock
     uploaded_file = UploadedFile(
-        filename=sanitized_filename,
-        file_url=file_url,
+        filename=filename,
+        file_url="",
         event_id=event_id,
-        user_id=user.id
+        user_id=user.id,
+        sha256=sha256,
+        size=size
     )
+    uploaded_file.file_url = f"{files_url}/{uploaded_file.id}"
     db.add(uploaded_file)
     db.commit()
     db.refresh(uploaded_file)
+    return uploaded_file
+
+
+async def save_uploaded_file(
+    request: Request,
+    db: SessionDep,
+    user: CurrentUser,
+    event_id: uuid.UUID,
+    filename: str,
+    temp_path: str,
+    sha256: str,
+    size: int
+) -> UploadResponse:
+    """Moves a received file into the blob store, records it and notifies the event."""
+    # Construct the full URL of the download endpoint
+    files_url = f"{request.url.scheme}://{request.headers['host']}{settings.API_V1_STR}/files"
+    uploaded_file = await run_in_threadpool(
+        store_uploaded_file, db, user, event_id, filename, temp_path, sha256, size, files_url
+    )
+    file_url = uploaded_file.file_url
+
+    preview_pipeline.schedule(sha256, filename)
 
     message_data = {
         "type": "file",
-        "filename": sanitized_filename,
+        "filename": filename,
         "file_url": str(file_url),
         "user_id": str(user.id),
         "full_name": user.full_name,
@@ -102,17 +259,142 @@ async def upload_file(
     await manager.send_message_to_event(str(event_id), message_data)
 
     return UploadResponse(
-        filename=sanitized_filename,
+        filename=filename,
         file_url=str(file_url),
         message="File uploaded and event notified"
     )
 
+
+# Resumable uploads: init declares the file, chunks are PUT at any offset, in any
+# order and in parallel, GET tells a reconnecting client what is still missing,
+# and complete assembles the file and stores it like a regular upload.
+
+async def get_resumable_upload(upload_id: uuid.UUID, user: CurrentUser) -> ResumableUpload:
+    upload = await run_in_threadpool(load_upload, upload_id)
+    if upload is None or upload.user_id != str(user.id):
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    return upload
+
+
+def resumable_upload_status(upload: ResumableUpload) -> ResumableUploadStatus:
+    return ResumableUploadStatus(
+        id=upload.id,
+        event_id=uuid.UUID(upload.event_id),
+        filename=upload.filename,
+        size=upload.size,
+        chunk_size=MAX_CHUNK_SIZE,
+        missing=missing_ranges(upload),
+    )
+
+
+@router.post("/uploads/", response_model=ResumableUploadStatus, status_code=status.HTTP_201_CREATED, tags=["File Upload"])
+async def create_resumable_upload(
+    upload_in: ResumableUploadCreate,
+    db: SessionDep,
+    user: CurrentUser
+):
+    await run_in_threadpool(check_upload_permission, db, upload_in.event_id, user)
+    if upload_in.size > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="File is too large.")
+    sanitized_filename = quote(upload_in.filename)
+    await run_in_threadpool(check_filename_available, db, upload_in.event_id, sanitized_filename)
+
+    upload = await run_in_threadpool(
+        create_upload, upload_in.event_id, user.id, sanitized_filename, upload_in.size
+    )
+    return resumable_upload_status(upload)
+
+
+@router.get("/uploads/{upload_id}", response_model=ResumableUploadStatus, tags=["File Upload"])
+async def read_resumable_upload(upload_id: uuid.UUID, user: CurrentUser):
+    upload = await get_resumable_upload(upload_id, user)
+    return await run_in_threadpool(resumable_upload_status, upload)
+
+
+@router.put(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    tags=["File Upload"],
+    openapi_extra={"requestBody": {"content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}}},
+)
+async def upload_chunk(
+    request: Request,
+    upload_id: uuid.UUID,
+    user: CurrentUser,
+    offset: int = Query(ge=0)
+):
+    """Stores the request body as the bytes of the file starting at offset."""
+    upload = await get_resumable_upload(upload_id, user)
+    if offset >= upload.size:
+        raise HTTPException(status_code=400, detail="Offset is past the end of the file.")
+
+    try:
+        max_size = await run_in_threadpool(chunk_allowance, upload, offset)
+        if max_size <= 0:
+            raise HTTPException(status_code=413, detail="Chunks exceed the size of the file.")
+        temp_path, size = await stream_body(request, chunk_directory(upload.id), max_size)
+        if size == 0:
+            os.remove(temp_path)
+            raise HTTPException(status_code=400, detail="Empty chunk.")
+        # Parallel chunks may have been stored meanwhile
+        if size > await run_in_threadpool(chunk_allowance, upload, offset):
+            os.remove(temp_path)
+            raise HTTPException(status_code=413, detail="Chunks exceed the size of the file.")
+        await run_in_threadpool(commit_chunk, upload.id, temp_path, offset)
+    except FileNotFoundError:
+        # Completed, cancelled or expired meanwhile
+        raise HTTPException(status_code=404, detail="Upload not found.")
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=UploadResponse, status_code=status.HTTP_201_CREATED, tags=["File Upload"])
+async def complete_resumable_upload(
+    request: Request,
+    upload_id: uuid.UUID,
+    db: SessionDep,
+    user: CurrentUser
+):
+    upload = await get_resumable_upload(upload_id, user)
+    event_id = uuid.UUID(upload.event_id)
+    # Permissions may have changed since init
+    await run_in_threadpool(check_upload_permission, db, event_id, user)
+
+    # Only one of concurrent requests assembles and records the file
+    if not await run_in_threadpool(claim_upload, upload.id):
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    try:
+        if await run_in_threadpool(missing_ranges, upload):
+            raise HTTPException(status_code=409, detail="Upload is incomplete.")
+        await run_in_threadpool(check_filename_available, db, event_id, upload.filename)
+
+        try:
+            temp_path, sha256 = await run_in_threadpool(assemble_upload, upload, blob_store.temp_directory)
+        except FileNotFoundError:
+            # Expired meanwhile
+            raise HTTPException(status_code=404, detail="Upload not found.")
+        response = await save_uploaded_file(
+            request, db, user, event_id, upload.filename, temp_path, sha256, upload.size
+        )
+    except BaseException:
+        # A failed completion leaves the chunks for a retry
+        await run_in_threadpool(release_upload, upload.id)
+        raise
+    await run_in_threadpool(remove_upload, upload.id)
+    return response
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["File Upload"])
+async def cancel_resumable_upload(upload_id: uuid.UUID, user: CurrentUser):
+    upload = await get_resumable_upload(upload_id, user)
+    await run_in_threadpool(remove_upload, upload.id)
+
+
 @router.delete("/uploadfile/{file_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["File Upload"])
-async def delete_file(
+def delete_file(
     file_id: uuid.UUID,
     db: SessionDep,
     user: CurrentUser 
 ):
+    # A plain def runs in the threadpool, the blob lock and unlink block
     # Retrieve the file from the database
     uploaded_file = db.get(UploadedFile, file_id)
     if not uploaded_file:
@@ -130,14 +412,30 @@ async def delete_file(
     if uploaded_file.user_id != user.id and participant.permissions != EventPermission.ORGANIZE and not user.is_superuser:
         raise HTTPException(status_code=403, detail="Not enough permissions to delete this file.")
 
-    # Delete the file from the filesystem
-    file_location = os.path.join(UPLOAD_DIRECTORY, uploaded_file.filename)
-    if os.path.exists(file_location):
-        os.remove(file_location)
+    filename, sha256 = uploaded_file.filename, uploaded_file.sha256
 
-    # Delete the file record from the database
+    # Delete the file record from the database. The file is unlinked afterwards,
+    # a failed unlink only leaves an unreferenced file behind
     db.delete(uploaded_file)
     db.commit()
 
+    try:
+        if sha256 is None:
+            # Uploaded before the blob store, stored under its filename
+            file_location = os.path.join(UPLOAD_DIRECTORY, filename)
+            if os.path.exists(file_location):
+                os.remove(file_location)
+        else:
+            # The blob is unlinked with its last reference, the lock keeps
+            # uploads of the same content from referencing it meanwhile
+            lock_blob(db, sha256)
+            try:
+                if count_references(db, sha256) == 0:
+                    blob_store.remove(sha256)
+            finally:
+                db.rollback()
+    except OSError as e:
+        logger.error(f"Failed to remove the stored file of {filename}: {e}")
+
     return {"message": "File deleted successfully."}
 
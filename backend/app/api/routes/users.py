@@ -2,7 +2,7 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.api.deps import (
@@ -10,6 +10,7 @@ from app.api.deps import (
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.pagination import paginate
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -24,7 +25,9 @@ from app.models import (
     UserUpdate,
     UserUpdateMe,
 )
+from app.notifications.events_check import discard_pending_notifications
 from app.utils import generate_new_account_email, send_email
+from app.websockets.notifier import notification_scheduler
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -34,18 +37,20 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: SessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True,
+) -> Any:
     """
     Retrieve users.
     """
-
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
-
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
-
-    return UsersPublic(data=users, count=count)
+    users, count, next_cursor = paginate(
+        session, select(User), (User.id,), skip, limit, cursor, include_count
+    )
+    return UsersPublic(data=users, count=count, next_cursor=next_cursor)
 
 @router.get(
     "/select",
@@ -56,15 +61,16 @@ def read_users_for_select(
     session: SessionDep,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    include_count: bool = True,
 ) -> Any:
     """
     Retrieve users for event creation selector.
     """
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
-    return UsersPublic(data=users, count=count)
+    users, count, next_cursor = paginate(
+        session, select(User), (User.id,), skip, limit, cursor, include_count
+    )
+    return UsersPublic(data=users, count=count, next_cursor=next_cursor)
 
 @router.post(
     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic
@@ -110,8 +116,13 @@ def update_user_me(
     user_data = user_in.model_dump(exclude_unset=True)
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
+    if "reminder_offsets" in user_data:
+        # Pending reminders were timed with the previous offsets
+        discard_pending_notifications(session, user_id=current_user.id)
     session.commit()
     session.refresh(current_user)
+    if "reminder_offsets" in user_data:
+        notification_scheduler.reload()
     return current_user
 
 
@@ -153,7 +164,9 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
     session.delete(current_user)
+    discard_pending_notifications(session, user_id=current_user.id)
     session.commit()
+    notification_scheduler.reload()
     return Message(message="User deleted successfully")
 
 
@@ -219,7 +232,13 @@ def update_user(
                 status_code=409, detail="User with this email already exists"
             )
 
+    reminders_changed = "reminder_offsets" in user_in.model_fields_set
+    if reminders_changed:
+        # Pending reminders were timed with the previous offsets, discarded with the update
+        discard_pending_notifications(session, user_id=user_id)
     db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    if reminders_changed:
+        notification_scheduler.reload()
     return db_user
 
 
@@ -240,5 +259,7 @@ def delete_user(
     statement = delete(Item).where(col(Item.owner_id) == user_id)
     session.exec(statement)  # type: ignore
     session.delete(user)
+    discard_pending_notifications(session, user_id=user_id)
     session.commit()
+    notification_scheduler.reload()
     return Message(message="User deleted successfully")
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic.networks import EmailStr
-from sqlmodel import select
+from sqlalchemy import exists, or_
+from sqlalchemy.sql.elements import ColumnElement
+from typing import Any
 import uuid
 
 from app.api.deps import get_current_active_superuser, CurrentUser, SessionDep
+from app.api.permissions import permission_cache
 from app.models import (
     Message,
     Category,
@@ -15,6 +18,7 @@ from app.models import (
     EventPermission
 )
 from app.utils import generate_test_email, send_email
+from app.websockets.manager import manager
 
 router = APIRouter(prefix="/utils", tags=["utils"])
 
@@ -41,6 +45,28 @@ def test_email(email_to: EmailStr) -> Message:
 async def health_check() -> bool:
     return True
 
+
+@router.get(
+    "/permission-cache/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def permission_cache_stats() -> dict[str, Any]:
+    """
+    Hit and miss counters of the permission cache in this worker.
+    """
+    return permission_cache.stats()
+
+
+@router.get(
+    "/websocket-queues/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def websocket_queue_stats() -> dict[str, Any]:
+    """
+    Send queue depths of the websocket connections of this worker.
+    """
+    return manager.queue_stats()
+
 def check_category_permissions(
     session: SessionDep,
     current_user: CurrentUser,
@@ -64,14 +90,9 @@ def check_category_permissions(
         return True
 
     # Check participant
-    participant = session.exec(
-        select(CategoryParticipant).where(
-            CategoryParticipant.category_id == category.id,
-            CategoryParticipant.user_id == current_user.id
-        )
-    ).first()
+    permissions = permission_cache.grants(session, current_user.id).categories.get(category.id)
 
-    if not participant:
+    if permissions is None:
         raise HTTPException(
             status_code=403,
             detail="Not enough permissions to access this category"
@@ -82,13 +103,13 @@ def check_category_permissions(
         return True  # All participants can view
 
     elif required_permission == CategoryPermission.EDIT:
-        return participant.permissions in [
+        return permissions in [
             CategoryPermission.EDIT,
             CategoryPermission.MANAGE
         ]
 
     elif required_permission == CategoryPermission.MANAGE:
-        return participant.permissions == CategoryPermission.MANAGE
+        return permissions == CategoryPermission.MANAGE
 
     return False
 
@@ -111,26 +132,45 @@ def check_event_permissions(
         return True
 
     # Check participant
-    participant = session.exec(
-        select(EventParticipant).where(
-            EventParticipant.event_id == event.id,
-            EventParticipant.user_id == current_user.id
-        )
-    ).first()
+    permissions = permission_cache.grants(session, current_user.id).events.get(event.id)
 
-    if not participant:
+    if permissions is None:
         raise HTTPException(status_code=403, detail="Not an event participant")
 
     if required_permission == EventPermission.VIEW:
         return True
 
     elif required_permission == EventPermission.EDIT:
-        return participant.permissions in [
+        return permissions in [
             EventPermission.EDIT,
             EventPermission.ORGANIZE
         ]
 
     elif required_permission == EventPermission.ORGANIZE:
-        return participant.permissions == EventPermission.ORGANIZE
+        return permissions == EventPermission.ORGANIZE
 
     return False
+
+def event_visibility_clause(user_id: uuid.UUID) -> ColumnElement[bool]:
+    """
+    Filter for events visible to a non-superuser: events the user participates in
+    and events linked to categories the user owns or participates in.
+    Evaluated as correlated EXISTS subqueries, so the database never receives
+    the list of visible event ids.
+    """
+    is_participant = exists().where(
+        EventParticipant.event_id == Event.id,
+        EventParticipant.user_id == user_id
+    )
+    in_accessible_category = exists().where(
+        EventCategoryLink.event_id == Event.id,
+        EventCategoryLink.category_id == Category.id,
+        or_(
+            Category.owner_id == user_id,
+            exists().where(
+                CategoryParticipant.category_id == Category.id,
+                CategoryParticipant.user_id == user_id
+            )
+        )
+    )
+    return or_(is_participant, in_accessible_category)
@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+
+# Bytes collected from the request before they are handed to a writer thread
+UPLOAD_WRITE_SIZE = 1024 * 1024
+
+# Request body schema of the streamed upload routes, they don't declare
+# an UploadFile parameter so FastAPI doesn't spool the body on its own
+UPLOAD_REQUEST_BODY = {
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }
+        }
+    },
+    "required": True,
+}
+
+
+@dataclass
+class StreamedUpload:
+    """A file part written to a temporary file next to its final location."""
+    filename: str
+    path: str
+    size: int
+    sha256: str
+    content_type: str | None = None
+
+    def discard(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _BackgroundWriter:
+    """
+    Writes to a file in the thread pool with one write in flight,
+    so the next chunk of the request is read meanwhile.
+    """
+
+    def __init__(self, buffer: BinaryIO, checksum: "hashlib._Hash | None" = None) -> None:
+        self.buffer = buffer
+        self.checksum = checksum
+        self._pending: asyncio.Future | None = None
+
+    def _write(self, data: bytes) -> None:
+        # hashlib and file writes release the GIL, both run in the writer thread
+        if self.checksum is not None:
+            self.checksum.update(data)
+        self.buffer.write(data)
+
+    async def write(self, data: bytes) -> None:
+        if self._pending is not None:
+            await self._pending
+        self._pending = asyncio.ensure_future(run_in_threadpool(self._write, data))
+
+    async def finish(self) -> None:
+        if self._pending is not None:
+            await self._pending
+        await run_in_threadpool(self.buffer.close)
+
+    async def abort(self) -> None:
+        if self._pending is not None and not self._pending.done():
+            # Let the writer thread finish before the file is removed
+            await asyncio.wait([self._pending])
+        self.buffer.close()
+
+
+def _check_content_length(request: Request, max_size: int, overhead: int = 0) -> None:
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_size + overhead:
+        raise HTTPException(status_code=413, detail="File is too large.")
+
+
+class _FilePartCollector:
+    """Parser callbacks keeping the data of the file part, other parts are ignored."""
+
+    def __init__(self, field_name: str) -> None:
+        self.field_name = field_name
+        self.filename: str | None = None
+        self.content_type: str | None = None
+        self.chunks: list[bytes] = []
+        # Bytes of the file part received, and of them not taken yet
+        self.size = 0
+        self.buffered = 0
+        self._headers: dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._in_file = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field, self._value = b"", b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode()
+        if name != self.field_name or b"filename" not in options or self.filename is not None:
+            return
+        self._in_file = True
+        self.filename = options[b"filename"].decode()
+        content_type = self._headers.get(b"content-type")
+        self.content_type = content_type.decode() if content_type else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.chunks.append(data[start:end])
+            self.size += end - start
+            self.buffered += end - start
+
+    def on_part_end(self) -> None:
+        self._in_file = False
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.buffered = 0
+        return data
+
+
+async def stream_upload(
+    request: Request,
+    directory: str,
+    field_name: str = "file",
+    max_size: int | None = None,
+) -> StreamedUpload:
+    """
+    Reads the multipart request body as it arrives and writes the file part
+    to a temporary file in directory, so it can be moved into place with os.replace.
+    Writes and checksums run in the thread pool while the next chunk is read.
+    Uploads over max_size (settings.MAX_UPLOAD_SIZE by default) are rejected
+    with 413 as soon as the limit is crossed, without reading the rest.
+    """
+    max_size = settings.MAX_UPLOAD_SIZE if max_size is None else max_size
+    _check_content_length(request, max_size, overhead=64 * 1024)
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload.")
+
+    collector = _FilePartCollector(field_name)
+    parser = MultipartParser(options[b"boundary"], collector.callbacks())
+
+    def feed(chunk: bytes | None) -> None:
+        try:
+            if chunk is None:
+                parser.finalize()
+            else:
+                parser.write(chunk)
+        except ValueError:
+            # The parser errors derive from ValueError
+            raise HTTPException(status_code=400, detail="Malformed multipart body.")
+
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".part")
+    checksum = hashlib.sha256()
+    writer = _BackgroundWriter(os.fdopen(fd, "wb"), checksum)
+
+    try:
+        async for chunk in request.stream():
+            feed(chunk)
+            if collector.size > max_size:
+                raise HTTPException(status_code=413, detail="File is too large.")
+            if collector.buffered >= UPLOAD_WRITE_SIZE:
+                await writer.write(collector.take())
+        feed(None)
+        if collector.chunks:
+            await writer.write(collector.take())
+        await writer.finish()
+    except BaseException:
+        await writer.abort()
+        os.remove(path)
+        raise
+
+    if collector.filename is None:
+        os.remove(path)
+        raise HTTPException(status_code=400, detail="No file uploaded.")
+
+    return StreamedUpload(
+        filename=collector.filename,
+        path=path,
+        size=collector.size,
+        sha256=checksum.hexdigest(),
+        content_type=collector.content_type,
+    )
+
+
+async def stream_body(request: Request, directory: str, max_size: int) -> tuple[str, int]:
+    """
+    Writes the raw request body to a temporary file in directory the way
+    stream_upload writes a file part. Returns the file's path and size.
+    """
+    _check_content_length(request, max_size)
+
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".part")
+    writer = _BackgroundWriter(os.fdopen(fd, "wb"))
+    chunks: list[bytes] = []
+    buffered = 0
+    size = 0
+
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(status_code=413, detail="Chunk is too large.")
+            chunks.append(chunk)
+            buffered += len(chunk)
+            if buffered >= UPLOAD_WRITE_SIZE:
+                await writer.write(b"".join(chunks))
+                chunks, buffered = [], 0
+        if chunks:
+            await writer.write(b"".join(chunks))
+        await writer.finish()
+    except BaseException:
+        await writer.abort()
+        os.remove(path)
+        raise
+
+    return path, size
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.chat.permissions import is_user_participant_of_event
+from app.core.db import engine
+from app.models import EventParticipant, Message, MessageCreate
+
+logger = logging.getLogger(__name__)
+
+# Seconds a chat message may wait in memory before it is stored
+MESSAGE_FLUSH_INTERVAL = 0.05
+# Messages that trigger a flush right away, also the rows per INSERT
+MESSAGE_FLUSH_SIZE = 500
+# Seconds to wait after a failed flush
+MESSAGE_RETRY_INTERVAL = 1
+# Messages buffered at most, senders wait for a flush beyond that
+MESSAGE_BUFFER_LIMIT = 10 * MESSAGE_FLUSH_SIZE
+
+# Chat persistence for websocket handlers. Every call opens its own short-lived
+# session and is meant to run in a worker thread, e.g. through run_in_threadpool,
+# so the event loop never waits on the database and no connection is held
+# for the lifetime of a socket.
+
+
+def can_send_to_event_chat(event_id: str, user_id: uuid.UUID) -> bool | None:
+    """
+    Returns None if the user may not join the event chat, otherwise
+    whether the user may send messages to it (listeners may not).
+    """
+    with Session(engine) as session:
+        if not is_user_participant_of_event(session, event_id, user_id):
+            return None
+        participant = session.exec(
+            select(EventParticipant).where(
+                EventParticipant.event_id == event_id,
+                EventParticipant.user_id == user_id
+            )
+        ).first()
+        # Superusers may join without being participants
+        return participant is None or not participant.is_listener
+
+
+def message_payload(message: Message) -> dict:
+    """A chat message the way it is sent to the room."""
+    return {
+        "id": str(message.id),
+        "content": message.content,
+        "user_id": str(message.user_id),
+        "event_id": str(message.event_id),
+        "timestamp": message.timestamp.isoformat(),
+        "full_name": message.full_name,
+    }
+
+
+def insert_messages(rows: list[dict]) -> None:
+    """
+    Inserts messages with multi-row INSERT statements in one transaction.
+    If the batch is rejected, e.g. because an event was deleted meanwhile,
+    messages are retried one by one and the rejected ones are dropped.
+    """
+    with Session(engine) as session:
+        try:
+            for offset in range(0, len(rows), MESSAGE_FLUSH_SIZE):
+                session.execute(insert(Message).values(rows[offset:offset + MESSAGE_FLUSH_SIZE]))
+            session.commit()
+            return
+        except IntegrityError:
+            session.rollback()
+
+        for row in rows:
+            try:
+                session.execute(insert(Message).values(row))
+                session.commit()
+            except IntegrityError as e:
+                session.rollback()
+                logger.error(f"Dropped chat message {row['id']}: {e}")
+
+
+class MessageWriteBehind:
+    """
+    Write-behind buffer for chat messages. Ids and timestamps are assigned in the
+    app, so a message is broadcast right away and stored with the next batch:
+    every MESSAGE_FLUSH_INTERVAL seconds, or once MESSAGE_FLUSH_SIZE messages wait.
+
+    Durability: a message is broadcast before it is stored. Batches that fail on
+    a database error stay buffered and are retried. Messages still buffered are
+    flushed by stop() on shutdown, but a crashed or killed worker loses the ones
+    it buffered, which is at most the last MESSAGE_FLUSH_INTERVAL seconds of chat
+    plus whatever waited for an unreachable database. At most MESSAGE_BUFFER_LIMIT
+    messages are buffered, beyond that add() waits for a flush.
+    Until the flush the history endpoints find a message with find() only.
+    """
+
+    def __init__(self) -> None:
+        self._pending: list[dict] = []
+        # The batch being stored, kept until it is committed
+        self._flushing: list[dict] = []
+        self._has_messages: asyncio.Event | None = None
+        self._full: asyncio.Event | None = None
+        self._has_space: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._flush_task: asyncio.Future | None = None
+
+    def start(self) -> None:
+        self._has_messages = asyncio.Event()
+        self._full = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the flush loop and stores every buffered message."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_task is not None:
+            # The batch the loop was storing goes first
+            await self._flush_task
+            self._flush_task = None
+        while self._pending:
+            if not await self.flush():
+                logger.error(f"Lost {len(self._pending)} chat messages on shutdown")
+                break
+
+    async def add(self, message: MessageCreate) -> dict:
+        """
+        Buffers a message and returns its payload for the room.
+        Waits for a flush while the buffer is full.
+        """
+        if self._has_space is not None:
+            while len(self._pending) + len(self._flushing) >= MESSAGE_BUFFER_LIMIT:
+                self._has_space.clear()
+                self._full.set()
+                await self._has_space.wait()
+
+        db_message = Message.model_validate(message)
+        self._pending.append(db_message.model_dump(exclude={"event", "user"}))
+        if self._has_messages is not None:
+            self._has_messages.set()
+            if len(self._pending) >= MESSAGE_FLUSH_SIZE:
+                self._full.set()
+        return message_payload(db_message)
+
+    def find(self, message_id: uuid.UUID) -> Message | None:
+        """
+        Returns a message that is buffered or being stored, None otherwise.
+        A message leaves the buffer only once it is committed, so one that isn't
+        found here is either stored already or unknown. Safe to call from worker threads.
+        """
+        for row in (*self._flushing, *self._pending):
+            if row["id"] == message_id:
+                return Message.model_validate(row)
+        return None
+
+    async def flush(self) -> bool:
+        """Stores the buffered messages, returns False if the batch failed and is kept."""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return True
+        self._flushing = batch
+        try:
+            await run_in_threadpool(insert_messages, batch)
+        except Exception as e:
+            logger.exception(f"Failed to store {len(batch)} chat messages, retrying: {e}")
+            self._pending = batch + self._pending
+            return False
+        finally:
+            self._flushing = []
+        if self._has_space is not None:
+            self._has_space.set()
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_messages.wait()
+            # Gather more messages into the batch unless it is full already
+            try:
+                await asyncio.wait_for(self._full.wait(), MESSAGE_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._has_messages.clear()
+            self._full.clear()
+            # Shielded, so stop() cancelling the loop lets a started batch finish
+            self._flush_task = asyncio.ensure_future(self.flush())
+            stored = await asyncio.shield(self._flush_task)
+            self._flush_task = None
+            if not stored:
+                await asyncio.sleep(MESSAGE_RETRY_INTERVAL)
+            if self._pending:
+                self._has_messages.set()
+
+
+message_writer = MessageWriteBehind()
@@ -36,6 +36,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Lifetime of the signed URLs of uploaded files, long enough to watch a recording
+    DOWNLOAD_TOKEN_EXPIRE_MINUTES: int = 60
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -47,6 +49,11 @@ class Settings(BaseSettings):
     # Set path relative to this settings.py file's location to the root folder
     BASE_DIR: ClassVar[str] = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     UPLOAD_DIRECTORY: str = os.path.join(BASE_DIR, "uploaded_files")
+    # Uploads larger than this many bytes are rejected while they stream in
+    MAX_UPLOAD_SIZE: int = 1024 * 1024 * 1024
+
+    # Fan-out of websocket messages between workers, "memory" keeps it in one process
+    WEBSOCKET_PUBSUB: Literal["postgres", "memory"] = "postgres"
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -10,6 +10,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 ALGORITHM = "HS256"
+# Audience of download tokens, which are therefore rejected as access tokens
+DOWNLOAD_AUDIENCE = "download"
 
 
 def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
@@ -19,6 +21,25 @@ def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
     return encoded_jwt
 
 
+def create_download_token(file_id: str | Any, user_id: str | Any, expires_delta: timedelta) -> str:
+    expire = datetime.now(timezone.utc) + expires_delta
+    to_encode = {"exp": expire, "sub": str(user_id), "file": str(file_id), "aud": DOWNLOAD_AUDIENCE}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def verify_download_token(token: str, file_id: str | Any) -> str | None:
+    """Returns the user a download token was issued to, None if it is invalid, expired or for another file."""
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[ALGORITHM], audience=DOWNLOAD_AUDIENCE
+        )
+    except jwt.InvalidTokenError:
+        return None
+    if payload.get("file") != str(file_id):
+        return None
+    return payload.get("sub")
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
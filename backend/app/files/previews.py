@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import mimetypes
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal
+from urllib.parse import unquote
+
+from app.files.storage import blob_store
+
+logger = logging.getLogger(__name__)
+
+PreviewKind = Literal["image", "pdf"]
+
+# Longest side of a preview in pixels
+PREVIEW_SIZE = 320
+PREVIEW_QUALITY = 80
+# Processes rendering previews, decoding is CPU bound and stays out of the web workers
+PREVIEW_WORKERS = 2
+# Formats Pillow decodes, vector images like SVG are left out
+IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff"}
+
+
+def preview_kind(filename: str) -> PreviewKind | None:
+    media_type = mimetypes.guess_type(unquote(filename))[0]
+    if media_type in IMAGE_TYPES:
+        return "image"
+    if media_type == "application/pdf":
+        return "pdf"
+    return None
+
+
+def render_preview(source: str, destination: str, kind: PreviewKind) -> None:
+    """
+    Renders a JPEG preview of an image or of the first page of a PDF.
+    Runs in a pool process, the libraries are imported there only.
+    """
+    from PIL import Image, ImageOps
+
+    if kind == "pdf":
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(source)
+        try:
+            page = document[0]
+            width, height = page.get_size()
+            # Render close to the preview size instead of the page's full resolution
+            image = page.render(scale=PREVIEW_SIZE / max(width, height, 1)).to_pil()
+        finally:
+            document.close()
+    else:
+        image = Image.open(source)
+        # JPEGs decode at a fraction of their size directly
+        image.draft("RGB", (PREVIEW_SIZE, PREVIEW_SIZE))
+        image = ImageOps.exif_transpose(image)
+
+    image.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(destination), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            image.save(output, "JPEG", quality=PREVIEW_QUALITY, optimize=True)
+        if not os.path.exists(source):
+            # The blob was deleted while rendering
+            os.remove(temp_path)
+            return
+        os.replace(temp_path, destination)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    # The blob may also go between the check and the rename, after its preview was
+    # removed, so the check is repeated to not leave the preview behind
+    if not os.path.exists(source):
+        try:
+            os.remove(destination)
+        except FileNotFoundError:
+            pass
+
+
+class PreviewPipeline:
+    """
+    Renders previews of uploaded blobs in a process pool, in the background of
+    the upload request. A preview is written once per blob, so files sharing
+    content share it too; the files listing links the previews that exist.
+    """
+
+    def __init__(self, workers: int = PREVIEW_WORKERS) -> None:
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        # Blobs with a preview being rendered by this process
+        self._rendering: set[str] = set()
+
+    def schedule(self, sha256: str, filename: str) -> None:
+        """Starts rendering the preview of a blob unless it has one or can't have one."""
+        kind = preview_kind(filename)
+        if kind is None or sha256 in self._rendering or os.path.exists(blob_store.preview_path(sha256)):
+            return
+        if self._pool is None:
+            # Forking a process that runs an event loop and threads isn't safe
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+        self._rendering.add(sha256)
+        future = asyncio.get_running_loop().run_in_executor(
+            self._pool, render_preview, blob_store.path(sha256), blob_store.preview_path(sha256), kind
+        )
+        future.add_done_callback(lambda done: self._rendered(sha256, filename, done))
+
+    def _rendered(self, sha256: str, filename: str, future: asyncio.Future) -> None:
+        self._rendering.discard(sha256)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.warning(f"Failed to render a preview of {filename}: {future.exception()}")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+preview_pipeline = PreviewPipeline()
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from dataclasses import asdict, dataclass
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Resumable uploads keep their chunks under this directory, one directory per upload:
+#   <upload_id>/upload.json        what init declared, renamed to completing.json
+#                                  while a request completes the upload
+#   <upload_id>/chunks/<offset>    the bytes received at offset
+# Chunks are written to a temporary name and renamed into place, so parallel
+# PUTs never see each other's partial writes and a retried chunk simply replaces
+# the old one. The state lives on disk only, all workers of a host share it.
+RESUMABLE_DIRECTORY = os.path.join(settings.UPLOAD_DIRECTORY, "resumable")
+
+# Largest chunk accepted by one PUT
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Uploads without a new chunk for this long are removed
+UPLOAD_SESSION_TTL = 24 * 60 * 60
+# Seconds between sweeps for expired uploads
+CLEANUP_INTERVAL = 60 * 60
+
+ASSEMBLE_BUFFER_SIZE = 1024 * 1024
+
+
+@dataclass
+class ResumableUpload:
+    id: str
+    event_id: str
+    user_id: str
+    filename: str
+    size: int
+    created_at: float
+
+
+def upload_directory(upload_id: uuid.UUID | str) -> str:
+    return os.path.join(RESUMABLE_DIRECTORY, str(upload_id))
+
+
+def chunk_directory(upload_id: uuid.UUID | str) -> str:
+    return os.path.join(upload_directory(upload_id), "chunks")
+
+
+def create_upload(event_id: uuid.UUID, user_id: uuid.UUID, filename: str, size: int) -> ResumableUpload:
+    upload = ResumableUpload(
+        id=uuid.uuid4().hex,
+        event_id=str(event_id),
+        user_id=str(user_id),
+        filename=filename,
+        size=size,
+        created_at=time.time(),
+    )
+    os.makedirs(chunk_directory(upload.id))
+    with open(os.path.join(upload_directory(upload.id), "upload.json"), "w") as f:
+        json.dump(asdict(upload), f)
+    return upload
+
+
+def load_upload(upload_id: uuid.UUID) -> ResumableUpload | None:
+    try:
+        with open(os.path.join(upload_directory(upload_id.hex), "upload.json")) as f:
+            return ResumableUpload(**json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+def claim_upload(upload_id: str) -> bool:
+    """
+    Takes an upload for completion. The rename is atomic, so of concurrent
+    requests only one gets True; load_upload doesn't find a claimed upload.
+    """
+    directory = upload_directory(upload_id)
+    try:
+        os.rename(os.path.join(directory, "upload.json"), os.path.join(directory, "completing.json"))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def release_upload(upload_id: str) -> None:
+    """Hands a claimed upload back after a failed completion, so it can be retried."""
+    directory = upload_directory(upload_id)
+    try:
+        os.rename(os.path.join(directory, "completing.json"), os.path.join(directory, "upload.json"))
+    except FileNotFoundError:
+        # Removed by the expiry sweep meanwhile
+        pass
+
+
+def remove_upload(upload_id: str) -> None:
+    shutil.rmtree(upload_directory(upload_id), ignore_errors=True)
+
+
+def commit_chunk(upload_id: str, temp_path: str, offset: int) -> None:
+    os.replace(temp_path, os.path.join(chunk_directory(upload_id), str(offset)))
+    # Counts as activity for the expiry sweep
+    os.utime(upload_directory(upload_id))
+
+
+def _chunks(upload_id: str) -> list[tuple[int, int]]:
+    """(offset, length) of the stored chunks, ordered by offset."""
+    chunks = []
+    with os.scandir(chunk_directory(upload_id)) as entries:
+        for entry in entries:
+            if entry.name.isdigit():
+                chunks.append((int(entry.name), entry.stat().st_size))
+    return sorted(chunks)
+
+
+def chunk_allowance(upload: ResumableUpload, offset: int) -> int:
+    """
+    Largest chunk that may be stored at offset. Chunks may overlap, but together
+    they hold at most the file size plus one chunk; a chunk replacing the one
+    at the same offset doesn't count that one.
+    """
+    stored = sum(length for chunk_offset, length in _chunks(upload.id) if chunk_offset != offset)
+    return min(MAX_CHUNK_SIZE, upload.size - offset, upload.size + MAX_CHUNK_SIZE - stored)
+
+
+def received_ranges(upload_id: str) -> list[tuple[int, int]]:
+    """Merged [start, end) byte ranges received so far."""
+    ranges: list[tuple[int, int]] = []
+    for offset, length in _chunks(upload_id):
+        end = offset + length
+        if ranges and offset <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+        elif length:
+            ranges.append((offset, end))
+    return ranges
+
+
+def missing_ranges(upload: ResumableUpload) -> list[tuple[int, int]]:
+    missing = []
+    position = 0
+    for start, end in received_ranges(upload.id):
+        if start > position:
+            missing.append((position, start))
+        position = max(position, end)
+    if position < upload.size:
+        missing.append((position, upload.size))
+    return missing
+
+
+def assemble_upload(upload: ResumableUpload, directory: str) -> tuple[str, str]:
+    """
+    Concatenates the chunks of a complete upload into a temporary file in directory.
+    Overlapping chunks are written once. Returns the file's path and SHA-256.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".part")
+    checksum = hashlib.sha256()
+    position = 0
+    try:
+        with os.fdopen(fd, "wb") as output:
+            for offset, length in _chunks(upload.id):
+                if offset + length <= position:
+                    continue
+                with open(os.path.join(chunk_directory(upload.id), str(offset)), "rb") as chunk:
+                    chunk.seek(position - offset)
+                    while position < offset + length:
+                        data = chunk.read(min(ASSEMBLE_BUFFER_SIZE, offset + length - position))
+                        checksum.update(data)
+                        output.write(data)
+                        position += len(data)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, checksum.hexdigest()
+
+
+def clean_expired_uploads(ttl: float = UPLOAD_SESSION_TTL) -> int:
+    """Removes uploads without activity for ttl seconds, returns how many."""
+    if not os.path.isdir(RESUMABLE_DIRECTORY):
+        return 0
+    expired = 0
+    now = time.time()
+    with os.scandir(RESUMABLE_DIRECTORY) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir() and now - entry.stat().st_mtime > ttl:
+                    remove_upload(entry.name)
+                    expired += 1
+            except FileNotFoundError:
+                # Removed by another worker meanwhile
+                continue
+    if expired:
+        logger.info(f"Removed {expired} expired resumable uploads")
+    return expired
+
+
+async def clean_expired_uploads_loop() -> None:
+    while True:
+        try:
+            await run_in_threadpool(clean_expired_uploads)
+        except Exception as e:
+            logger.exception(f"Failed to clean expired uploads: {e}")
+        await asyncio.sleep(CLEANUP_INTERVAL)
@@ -0,0 +1,67 @@
+import os
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models import UploadedFile
+
+
+class BlobStore:
+    """
+    Content-addressed file storage. A file is stored once per SHA-256, however
+    many UploadedFile rows point at it; the rows are its reference count.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        # Uploads stream into this directory, on the same filesystem as the blobs
+        self.temp_directory = os.path.join(root, "tmp")
+
+    def relative_path(self, sha256: str) -> str:
+        """
+        Blobs live under blobs/<2 hex>/<2 hex>/<sha256>, so no directory holds
+        more than a few entries even with millions of files.
+        """
+        return os.path.join("blobs", sha256[:2], sha256[2:4], sha256)
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, self.relative_path(sha256))
+
+    def add(self, temp_path: str, sha256: str) -> bool:
+        """
+        Moves a fully written temporary file into the store.
+        Returns False if the content was stored already, the temporary file is then removed.
+        """
+        path = self.path(sha256)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return True
+
+    def preview_path(self, sha256: str) -> str:
+        """Previews are cached next to their blob and shared like it."""
+        return self.path(sha256) + ".preview.jpg"
+
+    def remove(self, sha256: str) -> None:
+        for path in (self.path(sha256), self.preview_path(sha256)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def lock_blob(session: Session, sha256: str) -> None:
+    """
+    Serializes adding and releasing references to one blob until the transaction ends,
+    so a blob is never unlinked while an upload starts pointing at it.
+    """
+    session.exec(select(func.pg_advisory_xact_lock(func.hashtext(sha256))))
+
+
+def count_references(session: Session, sha256: str) -> int:
+    query = select(func.count()).select_from(UploadedFile).where(UploadedFile.sha256 == sha256)
+    return session.exec(query).one()
+
+
+blob_store = BlobStore(settings.UPLOAD_DIRECTORY)
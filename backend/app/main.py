@@ -2,12 +2,15 @@ import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles 
 
 from app.websockets.notifier import send_scheduled_notifications_loop
 from app.api.main import api_router
 from app.core.config import settings
 
+from app.chat.store import message_writer
+from app.files.previews import preview_pipeline
+from app.files.resumable import clean_expired_uploads_loop
+from app.websockets.pubsub import pubsub
 from app.websockets.router import register_websocket_routes
 import app.websockets.routes
 
@@ -34,9 +37,6 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
-# Mount the uploaded_files directory to serve files
-app.mount("/files", StaticFiles(directory=settings.UPLOAD_DIRECTORY), name="uploaded_files")
-
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 # Register websocket routes for chat/notifications
@@ -45,4 +45,15 @@ register_websocket_routes(app)
 @app.on_event("startup")
 async def startup_event():
     import asyncio
+    await pubsub.start()
+    message_writer.start()
     asyncio.create_task(send_scheduled_notifications_loop())
+    asyncio.create_task(clean_expired_uploads_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Store buffered chat messages before the worker exits
+    await message_writer.stop()
+    await pubsub.stop()
+    preview_pipeline.shutdown()
@@ -1,9 +1,11 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List
+from typing import Annotated, Any, Optional
 
 from pydantic import EmailStr
+from sqlalchemy import Column, Computed, Index, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, TSRANGE
 from sqlmodel import Field, Relationship, SQLModel
 
 # --- Add Enums first ---
@@ -38,6 +40,13 @@ class EventPermission(str, Enum):
     EDIT = "edit"
     ORGANIZE = "organize"
 
+# Minutes before an event start to send reminders at, up to a day ahead
+MAX_REMINDER_OFFSET = 24 * 60
+ReminderOffsets = Annotated[
+    list[Annotated[int, Field(ge=0, le=MAX_REMINDER_OFFSET)]],
+    Field(max_length=10)
+]
+
 
 # Shared properties
 class UserBase(SQLModel):
@@ -48,6 +57,8 @@ class UserBase(SQLModel):
     # New fields
     position: str | None = Field(default=None, max_length=255)
     department: str | None = Field(default=None, max_length=255)
+    # None falls back to the default reminder offsets
+    reminder_offsets: ReminderOffsets | None = None
 
 # Properties to receive via API on creation
 class UserCreate(UserBase):
@@ -71,6 +82,7 @@ class UserUpdate(UserBase):
 class UserUpdateMe(SQLModel):
     full_name: str | None = Field(default=None, max_length=255)
     email: EmailStr | None = Field(default=None, max_length=255)
+    reminder_offsets: ReminderOffsets | None = None
 
 
 class UpdatePassword(SQLModel):
@@ -82,6 +94,7 @@ class UpdatePassword(SQLModel):
 class User(UserBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
+    reminder_offsets: list[int] | None = Field(default=None, sa_column=Column(ARRAY(Integer)))
     items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
     # New fields - relation with events
     events: list["Event"] = Relationship(back_populates="creator", cascade_delete=True)
@@ -91,7 +104,7 @@ class User(UserBase, table=True):
     category_participations: list["CategoryParticipant"] = Relationship(back_populates="user")
     event_participations: list["EventParticipant"] = Relationship(back_populates="user")
     # Messaging
-    messages: List["Message"] = Relationship(back_populates="user", cascade_delete=True)
+    messages: list["Message"] = Relationship(back_populates="user", cascade_delete=True)
 
 
 # Properties to return via API, id is always required
@@ -100,7 +113,9 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None
+    # Opaque cursor of the next page, None on the last page
+    next_cursor: str | None = None
 
 # Shared properties
 class ItemBase(SQLModel):
@@ -195,7 +210,8 @@ class CategoryPublic(CategoryBase):
 
 class CategoriesPublic(SQLModel):
     data: list[CategoryPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 class CategoryParticipant(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
@@ -239,6 +255,10 @@ class EventBase(SQLModel):
     priority: EventPriority = EventPriority.MEDIUM
     is_finished: bool = False
     max_repeats_count: int = Field(default=0, ge=0)
+    # Store only the recurrence rule and expand occurrences on read
+    repeat_virtual: bool = False
+    # Overrides reminder offsets of every participant
+    reminder_offsets: ReminderOffsets | None = None
 
 class EventCreate(EventBase):
     category_id: uuid.UUID = Field(foreign_key="category.id")
@@ -253,6 +273,7 @@ class EventUpdate(SQLModel):
     repeat_type: RepeatType | None = None
     repeat_step: int | None = Field(default=None, ge=0)
     repeat_until: datetime | None = None
+    reminder_offsets: ReminderOffsets | None = None
     is_private: bool | None = None
     priority: EventPriority | None = None
     is_finished: bool | None = None
@@ -260,12 +281,30 @@ class EventUpdate(SQLModel):
     category_id: uuid.UUID | None = Field(default=None, foreign_key="category.id")
 
 class Event(EventBase, table=True):
+    __table_args__ = (
+        Index("ix_event_during", "during", postgresql_using="gist"),
+        Index("ix_event_start_id", "start", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     creator_id: uuid.UUID = Field(
         foreign_key="user.id", 
         nullable=False, 
         ondelete="CASCADE"
     )
+    # Series parent of a materialized recurring duplicate
+    recurring_parent_id: uuid.UUID | None = Field(
+        default=None,
+        foreign_key="event.id",
+        index=True,
+        ondelete="SET NULL"
+    )
+    reminder_offsets: list[int] | None = Field(default=None, sa_column=Column(ARRAY(Integer)))
+    # [start, end) range generated by Postgres, GiST indexed for overlap lookups
+    during: Any | None = Field(
+        default=None,
+        sa_column=Column(TSRANGE, Computed('tsrange(start, "end")', persisted=True))
+    )
     creator: Optional["User"] = Relationship(back_populates="events")
     categories: list["Category"] = Relationship(
         back_populates="events",
@@ -274,7 +313,7 @@ class Event(EventBase, table=True):
     )
     participants: list["EventParticipant"] = Relationship(back_populates="event")
     # Messaging
-    messages: List["Message"] = Relationship(back_populates="event", cascade_delete=True)
+    messages: list["Message"] = Relationship(back_populates="event", cascade_delete=True)
 
 class EventPublic(EventBase):
     id: uuid.UUID
@@ -282,7 +321,8 @@ class EventPublic(EventBase):
 
 class EventsPublic(SQLModel):
     data: list[EventPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
 
 class EventParticipant(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
@@ -317,29 +357,67 @@ class EventParticipantsPublic(SQLModel):
 
 
 class Notification(SQLModel, table=True):
+    """
+    Reminders of one participant for one occurrence. send_at moves to the
+    next reminder offset on every dispatch, sent is set after the last one.
+    """
+    __table_args__ = (
+        Index("ix_notification_user_id_event_id_event_start", "user_id", "event_id", "event_start", unique=True),
+        Index("ix_notification_send_at", "send_at", postgresql_where="NOT sent"),
+    )
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID
     event_id: uuid.UUID
+    event_start: datetime
     send_at: datetime
     sent: bool = False
 
 class BasicSearchResponse(SQLModel):
-    users: List[UserPublic]
-    events: List[EventPublic]
-    categories: List[CategoryPublic]
+    users: list[UserPublic]
+    events: list[EventPublic]
+    categories: list[CategoryPublic]
 
 class UploadedFile(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     filename: str
     file_url: str
+    event_id: uuid.UUID = Field(index=True)
+    user_id: uuid.UUID
+    # Content hash of the blob the file is stored in, shared by identical uploads.
+    # Files uploaded before the blob store have none and live under their filename
+    sha256: str | None = Field(default=None, max_length=64, index=True)
+    size: int | None = None
+
+class UploadedFilePublic(SQLModel):
+    id: uuid.UUID
+    filename: str
+    file_url: str
     event_id: uuid.UUID
     user_id: uuid.UUID
+    sha256: str | None = None
+    size: int | None = None
+    # Small JPEG of an image or of a PDF's first page, once rendered
+    preview_url: str | None = None
 
 class UploadResponse(SQLModel):
     filename: str
     file_url: str
     message: str
 
+class ResumableUploadCreate(SQLModel):
+    event_id: uuid.UUID
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(gt=0)
+
+class ResumableUploadStatus(SQLModel):
+    id: str
+    event_id: uuid.UUID
+    filename: str
+    size: int
+    chunk_size: int
+    # [start, end) byte ranges still to be uploaded
+    missing: list[tuple[int, int]]
+
 
 class MessageBase(SQLModel):
     content: str = Field(min_length=1, max_length=500)  # Adjust max_length as needed
@@ -355,6 +433,9 @@ class MessageUpdate(SQLModel):
     content: str | None = Field(default=None, min_length=1, max_length=500)
 
 class Message(MessageBase, table=True):
+    __table_args__ = (
+        Index("ix_message_event_id_timestamp", "event_id", "timestamp"),
+    )
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     event: "Event" = Relationship(back_populates="messages")
     user: "User" = Relationship(back_populates="messages")
@@ -363,5 +444,6 @@ class MessagePublic(MessageBase):
     id: uuid.UUID
 
 class MessagesPublic(SQLModel):
-    data: List[MessagePublic]
-    count: int
+    data: list[MessagePublic]
+    count: int | None
+    next_cursor: str | None = None
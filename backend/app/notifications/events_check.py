@@ -1,70 +1,188 @@
+import logging
+import uuid
 from datetime import datetime, timedelta
-from sqlmodel import Session, select, delete
-from app.models import Event, EventParticipant, Notification, User
 
-NOTIFY_DELTAS = [0, 1, 2, 3]  # minutes before the event to notify
+from sqlalchemy import DateTime, Integer, Interval, Uuid, column, false, func, literal, true, union_all, values
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlmodel import Session, select, delete, update
+from app.models import MAX_REMINDER_OFFSET, Event, EventParticipant, Notification, User
+from app.recurrence.series import iter_occurrences, overlap_clause
 
-def generate_notifications_from_upcoming_events(session: Session):
+logger = logging.getLogger(__name__)
+
+# Minutes before the event to notify, unless the event or the user sets their own
+NOTIFY_DELTAS = [0, 1, 2, 3]
+
+MINUTE = literal(timedelta(minutes=1), Interval)
+
+
+def reminder_offsets_clause():
+    """Offsets of a participant: the event's, else the user's, else NOTIFY_DELTAS."""
+    return func.coalesce(
+        Event.reminder_offsets,
+        User.reminder_offsets,
+        literal(NOTIFY_DELTAS, ARRAY(Integer))
+    )
+
+
+def next_reminder_at(event_start, offsets, after: datetime):
+    """Scalar subquery: the earliest reminder of an occurrence due after the given moment."""
+    offset = func.unnest(offsets).column_valued("offset")
+    send_at = event_start - offset * MINUTE
+    return select(func.min(send_at)).where(send_at > after).scalar_subquery()
+
+
+def generate_notifications_from_upcoming_events(
+    session: Session,
+    horizon: timedelta = timedelta(seconds=30)
+) -> int:
+    """
+    Creates one reminder row for every participant of every occurrence whose next
+    reminder is due within horizon, with a single INSERT ... SELECT. The row keeps
+    only the next send time, the following ones are computed from the reminder
+    offsets when it is dispatched. Existing rows are skipped by the unique
+    (user_id, event_id, event_start) index. Returns the number of rows generated.
+    """
     now = datetime.now()
-    upcoming_window = now + timedelta(minutes=max(NOTIFY_DELTAS), seconds=30)
+    until = now + horizon
+    upcoming_window = until + timedelta(minutes=MAX_REMINDER_OFFSET)
+
+    occurrences = select(Event.id.label("event_id"), Event.start.label("start")).where(
+        Event.repeat_virtual == false(),
+        Event.start > now,
+        Event.start <= upcoming_window
+    )
 
-    events = session.exec(
-        select(Event).where(Event.start <= upcoming_window)
+    # Virtual series are expanded into occurrences starting in the window
+    series = session.exec(
+        select(Event).where(Event.repeat_virtual == true(), overlap_clause(now, upcoming_window))
     ).all()
+    series_occurrences = [
+        (event.id, occurrence_start)
+        for event in series
+        for _, occurrence_start, _ in iter_occurrences(event, now, upcoming_window)
+        if occurrence_start > now
+    ]
+    if series_occurrences:
+        occurrences = union_all(
+            occurrences,
+            select(
+                values(column("event_id", Uuid), column("start", DateTime), name="series_occurrences")
+                .data(series_occurrences)
+            )
+        )
+    occurrences = occurrences.subquery()
+
+    reminders = (
+        select(
+            EventParticipant.user_id,
+            occurrences.c.event_id,
+            occurrences.c.start.label("event_start"),
+            next_reminder_at(occurrences.c.start, reminder_offsets_clause(), now).label("send_at")
+        )
+        .select_from(occurrences)
+        .join(Event, Event.id == occurrences.c.event_id)
+        .join(EventParticipant, EventParticipant.event_id == occurrences.c.event_id)
+        .join(User, User.id == EventParticipant.user_id)
+        .subquery()
+    )
 
-    for event in events:
-        participants = session.exec(
-            select(EventParticipant).where(EventParticipant.event_id == event.id)
-        ).all()
-
-        for delta in NOTIFY_DELTAS:
-            send_time = event.start - timedelta(minutes=delta)
-
-            # Skip if send_time already passed
-            if send_time < now:
-                continue
-
-            for participant in participants:
-                exists = session.exec(
-                    select(Notification).where(
-                        Notification.user_id == participant.user_id,
-                        Notification.event_id == event.id,
-                        Notification.send_at == send_time,
-                    )
-                ).first()
-
-                if not exists:
-                    notification = Notification(
-                        user_id=participant.user_id,
-                        event_id=event.id,
-                        message=f"🔔 Reminder: '{event.title}' at {event.start.strftime('%H:%M')}",
-                        send_at=send_time,
-                        sent=False
-                    )
-                    session.add(notification)
+    result = session.execute(
+        insert(Notification)
+        .from_select(
+            ["id", "user_id", "event_id", "event_start", "send_at", "sent"],
+            select(
+                func.gen_random_uuid(),
+                reminders.c.user_id,
+                reminders.c.event_id,
+                reminders.c.event_start,
+                reminders.c.send_at,
+                false()
+            )
+            # Skips occurrences whose reminders have all passed
+            .where(reminders.c.send_at <= until)
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "event_id", "event_start"])
+    )
     session.commit()
 
+    generated = max(result.rowcount, 0)
+    logger.info(f"Generated {generated} notifications up to {until}")
+    return generated
+
+
+def get_pending_send_times(session: Session, until: datetime) -> list[datetime]:
+    """
+    Distinct send times of notifications not sent yet, up to until.
+    Like get_upcoming_notifications it joins the user and the event, so rows
+    left behind by a deleted user or event, which can't be claimed, aren't
+    scheduled over and over until clean_old_notifications removes them.
+    """
+    return list(session.exec(
+        select(Notification.send_at).distinct()
+        .join(User, User.id == Notification.user_id)
+        .join(Event, Event.id == Notification.event_id)
+        .where(
+            Notification.sent == false(),
+            Notification.send_at <= until
+        )
+    ).all())
+
+
+def discard_pending_notifications(
+    session: Session,
+    event_id: uuid.UUID | None = None,
+    user_id: uuid.UUID | None = None
+) -> None:
+    """
+    Drops reminders that were not sent yet of an event, of a user, or of a user
+    for one event. The scheduler regenerates them from the current state. Doesn't commit.
+    """
+    filters = [Notification.sent == false()]
+    if event_id is not None:
+        filters.append(Notification.event_id == event_id)
+    if user_id is not None:
+        filters.append(Notification.user_id == user_id)
+    session.exec(delete(Notification).where(*filters))
+
 
 def get_upcoming_notifications(session: Session):
+    """
+    Claims every due reminder with one UPDATE ... FROM user, event ... RETURNING:
+    each claimed row moves on to its next reminder offset, or is marked sent
+    after the last one. Returns (user_id, json_data) pairs.
+    """
     now = datetime.now()
-    notifications = session.exec(
-        select(Notification).where(
-            Notification.sent == False,
+    next_send_at = next_reminder_at(Notification.event_start, reminder_offsets_clause(), now)
+    # Rows claimed by a concurrent dispatch are skipped, so each reminder goes out once
+    due = (
+        select(Notification.id)
+        .where(
+            Notification.sent == false(),
             Notification.send_at <= now
         )
+        .with_for_update(skip_locked=True)
+    )
+    rows = session.execute(
+        update(Notification)
+        .where(
+            Notification.id.in_(due),
+            Notification.user_id == User.id,
+            Notification.event_id == Event.id
+        )
+        .values(
+            send_at=func.coalesce(next_send_at, Notification.send_at),
+            sent=next_send_at.is_(None)
+        )
+        .returning(Notification.user_id, Notification.event_id, Notification.event_start, User.full_name, Event.title)
     ).all()
+    session.commit()
 
     full_notifications = []
 
-    for notif in notifications:
-        user = session.exec(select(User).where(User.id == notif.user_id)).first()
-        user_fullname = user.full_name if user else "Unknown User"
-
-        event = session.exec(select(Event).where(Event.id == notif.event_id)).first()
-        event_title = event.title if event else "Unknown Event"
-
-        time_diff = event.start - notif.send_at
-        remaining_minutes = max(0, int(time_diff.total_seconds() // 60))
+    for user_id, event_id, event_start, full_name, event_title in rows:
+        user_fullname = full_name or "Unknown User"
+        remaining_minutes = max(0, round((event_start - now).total_seconds() / 60))
 
         if remaining_minutes == 0:
             message = f"Event '{event_title}' started, {user_fullname}!"
@@ -73,14 +191,11 @@ def get_upcoming_notifications(session: Session):
 
         json_data = {
             "message": message,
-            "event_id": str(notif.event_id)
+            "event_id": str(event_id)
         }
 
-        notif.sent = True
-
-        full_notifications.append((notif.user_id, json_data))
+        full_notifications.append((user_id, json_data))
 
-    session.commit()
     return full_notifications
 
 
@@ -88,8 +203,7 @@ def clean_old_notifications(session: Session):
     cutoff = datetime.now() - timedelta(days=1)
     session.exec(
         delete(Notification).where(
-            Notification.sent == True,
-            Notification.send_at < cutoff
+            Notification.event_start < cutoff
         )
     )
     session.commit()
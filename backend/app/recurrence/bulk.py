@@ -0,0 +1,152 @@
+import logging
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select
+from sqlmodel import Session
+
+from app.models import (
+    Event,
+    EventCategoryLink,
+    EventParticipant,
+    Message,
+    Notification,
+    RepeatType,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement, keeps every statement far below
+# the 65535 bind parameters Postgres accepts
+BULK_INSERT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class SeriesRewriteStats:
+    """Rows touched per table while rewriting a series."""
+    event_id: uuid.UUID
+    deleted: dict[str, int] = field(default_factory=dict)
+    inserted: dict[str, int] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+
+    @property
+    def rows_touched(self) -> int:
+        return sum(self.deleted.values()) + sum(self.inserted.values())
+
+    def finish(self) -> None:
+        self.elapsed = time.perf_counter() - self.started
+        logger.info(
+            f"Series {self.event_id} rewritten: {self.rows_touched} rows touched "
+            f"(deleted {self.deleted}, inserted {self.inserted}) in {self.elapsed:.3f}s"
+        )
+
+
+def _insert_rows(
+    session: Session,
+    model: type,
+    rows: list[dict],
+    stats: SeriesRewriteStats | None = None
+) -> None:
+    """Inserts rows with multi-row INSERT ... VALUES statements."""
+    for offset in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+        session.execute(insert(model).values(rows[offset:offset + BULK_INSERT_CHUNK_SIZE]))
+    if stats is not None:
+        stats.inserted[model.__tablename__] = stats.inserted.get(model.__tablename__, 0) + len(rows)
+
+
+def delete_occurrences(session: Session, parent_event: Event) -> SeriesRewriteStats:
+    """
+    Deletes materialized occurrences of a series with one
+    DELETE ... WHERE event_id IN (subquery) per child table.
+    Only rows linked through recurring_parent_id belong to the series,
+    older duplicates were linked by a migration.
+    """
+    stats = SeriesRewriteStats(event_id=parent_event.id)
+    occurrence_ids = select(Event.id).where(
+        Event.recurring_parent_id == parent_event.id
+    ).scalar_subquery()
+
+    # Child tables first, the events themselves last
+    for model, column in (
+        (EventParticipant, EventParticipant.event_id),
+        (EventCategoryLink, EventCategoryLink.event_id),
+        (Message, Message.event_id),
+        (Notification, Notification.event_id),
+        (Event, Event.id),
+    ):
+        result = session.execute(
+            delete(model)
+            .where(column.in_(occurrence_ids))
+            .execution_options(synchronize_session=False)
+        )
+        stats.deleted[model.__tablename__] = result.rowcount
+    return stats
+
+
+def bulk_create_occurrences(
+    session: Session,
+    base_event: Event,
+    occurrences: Sequence[tuple[datetime, datetime]],
+    participants: Sequence[EventParticipant],
+    category_id: uuid.UUID | None,
+    creator_id: uuid.UUID,
+    repeat_step: int,
+    stats: SeriesRewriteStats | None = None
+) -> list[uuid.UUID]:
+    """
+    Writes materialized occurrences of a series together with their participant
+    copies and category links. Ids are generated here, so no flush is needed
+    between the events and their child rows.
+    """
+    event_ids = [uuid.uuid4() for _ in occurrences]
+
+    event_rows = [
+        {
+            "id": event_id,
+            "title": base_event.title,
+            "description": base_event.description,
+            "start": start,
+            "end": end,
+            "type": base_event.type,
+            "repeat_type": RepeatType.recurring_duplicate,  # Mark as duplicate
+            "repeat_step": repeat_step,
+            "repeat_until": None,
+            "is_private": base_event.is_private,
+            "priority": base_event.priority,
+            "is_finished": False,
+            "max_repeats_count": 0,
+            "repeat_virtual": False,
+            "reminder_offsets": base_event.reminder_offsets,
+            "creator_id": creator_id,
+            "recurring_parent_id": base_event.id,
+        }
+        for event_id, (start, end) in zip(event_ids, occurrences, strict=True)
+    ]
+
+    participant_rows = [
+        {
+            "id": uuid.uuid4(),
+            "event_id": event_id,
+            "user_id": participant.user_id,
+            "is_creator": participant.is_creator,
+            "is_listener": participant.is_listener,
+            "permissions": participant.permissions,
+        }
+        for event_id in event_ids
+        for participant in participants
+    ]
+
+    link_rows = []
+    if category_id:
+        link_rows = [{"event_id": event_id, "category_id": category_id} for event_id in event_ids]
+
+    # Events go first, participants and links reference them
+    _insert_rows(session, Event, event_rows, stats)
+    _insert_rows(session, EventParticipant, participant_rows, stats)
+    _insert_rows(session, EventCategoryLink, link_rows, stats)
+
+    return event_ids
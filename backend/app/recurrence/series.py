@@ -0,0 +1,320 @@
+import uuid
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timedelta
+from heapq import merge
+from itertools import islice
+
+from sqlalchemy import and_, false, or_, true
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, func, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.api.pagination import cursor_for, cursor_types, decode_cursor, keyset_filter
+from app.models import Event, EventPublic, RepeatType
+
+# Series are never expanded further than 10 years past their first occurrence
+MAX_SERIES_SPAN = timedelta(days=3650)
+
+_EPSILON = timedelta(microseconds=1)
+
+
+def get_repeat_delta(repeat_type: RepeatType | None, repeat_step: int | None) -> timedelta | None:
+    """
+    Returns the distance between two occurrences of a series,
+    or None if the repeat settings do not describe a series.
+    """
+    if not repeat_step or repeat_step <= 0:
+        return None
+
+    if repeat_type == RepeatType.hourly:
+        return timedelta(hours=repeat_step)
+    elif repeat_type == RepeatType.daily:
+        return timedelta(days=repeat_step)
+    elif repeat_type == RepeatType.weekly:
+        return timedelta(weeks=repeat_step)
+    elif repeat_type == RepeatType.monthly:
+        return timedelta(days=30 * repeat_step)
+    elif repeat_type == RepeatType.yearly:
+        return timedelta(days=365 * repeat_step)
+    return None
+
+
+def is_virtual_series(event: Event) -> bool:
+    """Checks if the event is a stored recurrence rule that has to be expanded."""
+    return bool(event.repeat_virtual) and get_repeat_delta(event.repeat_type, event.repeat_step) is not None
+
+
+def _naive(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def iter_occurrences(
+    event: Event,
+    window_start: datetime | None = None,
+    window_end: datetime | None = None
+) -> Iterator[tuple[int, datetime, datetime]]:
+    """
+    Yields (index, start, end) of every occurrence of a virtual series that overlaps
+    the window. Index 0 is the stored event itself, which is the only
+    occurrence of events that are not virtual series.
+    The first occurrence in the window is computed directly, so the cost
+    depends only on the number of occurrences inside the window.
+    """
+    step = get_repeat_delta(event.repeat_type, event.repeat_step) if event.repeat_virtual else None
+    base_start = _naive(event.start)
+    base_end = _naive(event.end)
+    if step is None:
+        if (window_start is None or base_end > window_start) and (window_end is None or base_start < window_end):
+            yield 0, base_start, base_end
+        return
+
+    repeat_until = _naive(event.repeat_until)
+    last_start = base_start + MAX_SERIES_SPAN
+    if repeat_until is not None:
+        last_start = min(last_start, repeat_until)
+
+    # First occurrence whose end is after the window start
+    index = 0
+    if window_start is not None and base_end <= window_start:
+        index = (window_start - base_end) // step + 1
+
+    while True:
+        if index > 0 and event.max_repeats_count > 0 and index > event.max_repeats_count:
+            break
+        current_start = base_start + step * index
+        if index > 0 and current_start > last_start:
+            break
+        if window_end is not None and current_start >= window_end:
+            break
+        yield index, current_start, base_end + step * index
+        index += 1
+
+
+def _occurrence(event: Event, index: int, start: datetime, end: datetime) -> Event | EventPublic:
+    if index == 0:
+        return event
+    return EventPublic.model_validate(event, update={
+        "start": start,
+        "end": end,
+        "repeat_type": RepeatType.recurring_duplicate,
+    })
+
+
+def iter_window_occurrences(
+    event: Event,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    after: tuple[datetime, uuid.UUID] | None = None
+) -> Iterator[Event | EventPublic]:
+    """
+    Yields the occurrences of a virtual series lying fully inside [start_date, end_date]
+    in start order, only those sorting after the (start, id) position when given.
+    """
+    # iter_occurrences looks for overlap, which misses zero-length occurrences
+    # on the window bounds and occurrences starting exactly at the position,
+    # so the search is widened by a microsecond and the window checked below
+    window_start = start_date
+    if after is not None:
+        window_start = after[0] if window_start is None else max(window_start, after[0])
+    if window_start is not None:
+        window_start -= _EPSILON
+    window_end = None if end_date is None else end_date + _EPSILON
+
+    for index, occurrence_start, occurrence_end in iter_occurrences(event, window_start, window_end):
+        if start_date is not None and occurrence_start < start_date:
+            continue
+        if end_date is not None and occurrence_end > end_date:
+            continue
+        if after is not None and (occurrence_start, event.id) <= after:
+            continue
+        yield _occurrence(event, index, occurrence_start, occurrence_end)
+
+
+def count_occurrences(event: Event, start_date: datetime | None = None, end_date: datetime | None = None) -> int:
+    """
+    Number of occurrences iter_window_occurrences yields without a position,
+    computed from the repeat settings instead of expanding the series.
+    """
+    step = get_repeat_delta(event.repeat_type, event.repeat_step) if event.repeat_virtual else None
+    if step is None:
+        return sum(1 for _ in iter_window_occurrences(event, start_date, end_date))
+
+    base_start = _naive(event.start)
+    base_end = _naive(event.end)
+    # Index 0 is the stored event, kept whatever the repeat limits say
+    last_start = base_start + MAX_SERIES_SPAN
+    repeat_until = _naive(event.repeat_until)
+    if repeat_until is not None:
+        last_start = min(last_start, repeat_until)
+    last = max(0, (last_start - base_start) // step)
+    if event.max_repeats_count > 0:
+        last = min(last, event.max_repeats_count)
+
+    first = 0
+    if start_date is not None and base_start < start_date:
+        first = -((base_start - start_date) // step)
+    if end_date is not None:
+        if base_end > end_date:
+            return 0
+        last = min(last, (end_date - base_end) // step)
+    return max(0, last - first + 1)
+
+
+def expand_events(
+    events: Sequence[Event],
+    start_date: datetime | None = None,
+    end_date: datetime | None = None
+) -> list[Event | EventPublic]:
+    """
+    Replaces virtual series with their occurrences inside [start_date, end_date].
+    Like the stored events filter, an occurrence is kept only if it lies fully inside the window.
+    Other events are passed through untouched.
+    """
+    result: list[Event | EventPublic] = []
+    for event in events:
+        if not event.repeat_virtual:
+            result.append(event)
+            continue
+        result.extend(iter_window_occurrences(event, start_date, end_date))
+    return result
+
+
+def stored_window_filters(start_date: datetime | None, end_date: datetime | None) -> list[ColumnElement[bool]]:
+    """
+    Date filters for events stored as plain rows.
+    The window is matched with <@ against the GiST indexed event range,
+    a missing bound leaves that side of the window unbounded.
+    """
+    filters = [Event.repeat_virtual == false()]
+    if start_date is not None or end_date is not None:
+        # An empty range is contained in every range, zero-length events
+        # are matched by their start instead
+        empty_in_window = [func.isempty(Event.during)]
+        if start_date is not None:
+            empty_in_window.append(Event.start >= start_date)
+        if end_date is not None:
+            empty_in_window.append(Event.start <= end_date)
+        filters.append(or_(
+            and_(~func.isempty(Event.during), Event.during.contained_by(func.tsrange(start_date, end_date, "[]"))),
+            and_(*empty_in_window)
+        ))
+    return filters
+
+
+def series_window_filters(start_date: datetime | None, end_date: datetime | None) -> list[ColumnElement[bool]]:
+    """Date filters for virtual series that may have occurrences inside the window."""
+    filters = [Event.repeat_virtual == true()]
+    if start_date is not None:
+        filters.append(or_(Event.repeat_until.is_(None), Event.repeat_until >= start_date))
+    if end_date is not None:
+        filters.append(Event.start <= end_date)
+    return filters
+
+
+def window_clause(start_date: datetime | None, end_date: datetime | None) -> ColumnElement[bool]:
+    """
+    Date filter for stored events which also keeps virtual series
+    that may have occurrences inside the window.
+    """
+    if start_date is None and end_date is None:
+        return true()
+    return or_(
+        and_(*stored_window_filters(start_date, end_date)),
+        and_(*series_window_filters(start_date, end_date))
+    )
+
+
+def occurrence_key(event: Event | EventPublic) -> tuple[datetime, uuid.UUID]:
+    """Sort key of events and occurrences, matches ORDER BY start, id."""
+    return _naive(event.start), event.id
+
+
+def paginate_with_series(
+    session: Session,
+    query: SelectOfScalar[Event],
+    start_date: datetime | None,
+    end_date: datetime | None,
+    skip: int,
+    limit: int,
+    cursor: str | None = None,
+    include_count: bool = True
+) -> tuple[list[Event | EventPublic], int | None, str | None]:
+    """
+    Pages over stored events merged with expanded occurrences of virtual series,
+    ordered by (start, id). Stored events are paged in the database: by offset,
+    or after the cursor position when a cursor is given.
+    Returns the page, the total count (None if not requested) and the next page cursor.
+    """
+    columns = (Event.start, Event.id)
+    stored_query = query.where(*stored_window_filters(start_date, end_date))
+    series = session.exec(query.where(*series_window_filters(start_date, end_date))).all()
+    occurrences_count = sum(count_occurrences(event, start_date, end_date) for event in series)
+
+    page_query = stored_query.order_by(*columns)
+    after = None
+    if cursor is not None:
+        after = decode_cursor(cursor, cursor_types(columns))
+        page_query = page_query.where(keyset_filter(columns, after))
+        skip = 0
+
+    # Series are expanded lazily, only the first skip + limit occurrences
+    # past the position are ever built
+    occurrences = list(islice(
+        merge(*(iter_window_occurrences(event, start_date, end_date, after) for event in series), key=occurrence_key),
+        skip + limit
+    ))
+
+    if occurrences:
+        # Occurrences interleave with stored events, merge the first skip + limit of both
+        page_query = page_query.limit(skip + limit)
+    else:
+        page_query = page_query.offset(skip).limit(limit)
+
+    count_over = include_count and cursor is None
+    if count_over:
+        # Total count arrives with the page through a window function
+        page_query = page_query.add_columns(func.count().over())
+
+    rows = session.execute(page_query).all()
+    stored = [row[0] for row in rows]
+
+    if occurrences:
+        events: list[Event | EventPublic] = list(
+            islice(merge(stored, occurrences, key=occurrence_key), skip, skip + limit)
+        )
+    else:
+        events = list(stored)
+
+    count = None
+    if count_over and rows:
+        count = rows[0][1] + occurrences_count
+    elif count_over and (skip == 0 or occurrences):
+        count = occurrences_count
+    elif include_count:
+        count_statement = select(func.count()).select_from(stored_query.subquery())
+        count = session.exec(count_statement).one() + occurrences_count
+
+    next_cursor = cursor_for(events[-1], columns) if events and len(events) == limit else None
+    return events, count, next_cursor
+
+
+def overlap_clause(start_date: datetime, end_date: datetime) -> ColumnElement[bool]:
+    """
+    Filter for events overlapping the window, including virtual series
+    that may have occurrences overlapping it.
+    """
+    return or_(
+        and_(
+            Event.repeat_virtual == false(),
+            # Zero-length events take no time
+            ~func.isempty(Event.during),
+            Event.during.overlaps(func.tsrange(start_date, end_date))
+        ),
+        and_(
+            Event.repeat_virtual == true(),
+            Event.start < end_date,
+            or_(Event.repeat_until.is_(None), Event.repeat_until + (Event.end - Event.start) > start_date)
+        )
+    )
@@ -0,0 +1,78 @@
+from collections.abc import Hashable, Iterable, Mapping
+from datetime import datetime, timedelta
+from typing import TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+def merge_intervals(ranges: Iterable[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    """
+    Unions busy ranges with a single sweep over them sorted by start.
+    Touching and overlapping ranges are merged, empty ranges are dropped.
+    """
+    merged: list[tuple[datetime, datetime]] = []
+    for start, end in sorted(ranges):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def find_free_slots(
+    busy_ranges: Iterable[tuple[datetime, datetime]],
+    start_date: datetime,
+    end_date: datetime,
+    duration: timedelta,
+    granularity: timedelta = timedelta(minutes=1),
+    max_slots: int = 200
+) -> list[datetime]:
+    """
+    Returns possible start times of a slot of the given duration inside [start_date, end_date].
+    Candidates are emitted from the start of every free gap with the given granularity,
+    so the cost is O(n log n) of the busy ranges plus the number of returned slots.
+    """
+    slots: list[datetime] = []
+    gap_start = start_date
+
+    clipped = ((max(start, start_date), min(end, end_date)) for start, end in busy_ranges)
+    for busy_start, busy_end in merge_intervals(clipped) + [(end_date, end_date)]:
+        # Emit candidates that fit into the gap before this busy range
+        current_time = gap_start
+        while current_time + duration <= busy_start and len(slots) < max_slots:
+            slots.append(current_time)
+            current_time += granularity
+
+        if len(slots) >= max_slots:
+            break
+        gap_start = max(gap_start, busy_end)
+
+    return slots
+
+
+def busy_buckets(
+    busy_by_participant: Mapping[K, Iterable[tuple[datetime, datetime]]],
+    start_date: datetime,
+    end_date: datetime,
+    bucket: timedelta
+) -> list[list[K]]:
+    """
+    Returns, for every bucket of [start_date, end_date), the participants busy during it.
+    A bucket counts as busy if any busy range overlaps it. Ranges of every participant
+    are merged first, so each participant is listed at most once per bucket.
+    """
+    buckets_count = -((start_date - end_date) // bucket)
+    busy: list[list[K]] = [[] for _ in range(max(0, buckets_count))]
+
+    for participant, ranges in busy_by_participant.items():
+        clipped = ((max(start, start_date), min(end, end_date)) for start, end in ranges)
+        for busy_start, busy_end in merge_intervals(clipped):
+            first = (busy_start - start_date) // bucket
+            last = min(-((start_date - busy_end) // bucket), buckets_count)
+            for index in range(first, last):
+                busy[index].append(participant)
+
+    return busy
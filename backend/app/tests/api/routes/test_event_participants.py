@@ -0,0 +1,43 @@
+from collections.abc import Generator
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.api.routes import event_participants
+from app.core.config import settings
+from app.models import Notification, User
+from app.tests.utils.event import create_random_event, delete_users
+from app.tests.utils.user import authentication_token_from_email, create_random_user
+
+
+@pytest.fixture
+def users(db: Session) -> Generator[list[User], None, None]:
+    users = [create_random_user(db) for _ in range(2)]
+    yield users
+    delete_users(db, users)
+
+
+def test_removed_participant_loses_pending_reminders(
+    client: TestClient, db: Session, users: list[User], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    reloads = []
+    monkeypatch.setattr(event_participants.notification_scheduler, "reload", lambda: reloads.append(True))
+    creator, participant = users
+    event = create_random_event(db, creator, participants=[participant])
+    send_at = datetime.now() + timedelta(minutes=1)
+    for user in users:
+        db.add(Notification(user_id=user.id, event_id=event.id, event_start=event.start, send_at=send_at))
+    db.commit()
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+
+    response = client.delete(
+        f"{settings.API_V1_STR}/events/{event.id}/participants/{participant.id}", headers=headers
+    )
+
+    assert response.status_code == 200
+    db.expire_all()
+    pending = db.exec(select(Notification.user_id).where(Notification.event_id == event.id)).all()
+    assert pending == [creator.id]
+    assert reloads == [True]
@@ -0,0 +1,365 @@
+import asyncio
+import uuid
+from collections.abc import Generator
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.api.routes import events
+from app.chat.store import MessageWriteBehind
+from app.core.config import settings
+from app.models import (
+    Event,
+    EventType,
+    Message,
+    MessageCreate,
+    Notification,
+    RepeatType,
+    User,
+)
+from app.tests.utils.event import (
+    create_random_category,
+    create_random_event,
+    delete_users,
+)
+from app.tests.utils.user import authentication_token_from_email, create_random_user
+
+
+@pytest.fixture
+def users(db: Session) -> Generator[list[User], None, None]:
+    users = [create_random_user(db) for _ in range(2)]
+    yield users
+    delete_users(db, users)
+
+
+@pytest.fixture
+def reloads(monkeypatch: pytest.MonkeyPatch) -> list[bool]:
+    reloads: list[bool] = []
+    monkeypatch.setattr(events.notification_scheduler, "reload", lambda: reloads.append(True))
+    return reloads
+
+
+def add_reminders(db: Session, event: Event, users: list[User]) -> None:
+    """Stores a sent reminder for the creator and a pending one for everyone else."""
+    creator, *others = users
+    db.add(Notification(
+        user_id=creator.id, event_id=event.id, event_start=event.start, send_at=datetime.now(), sent=True
+    ))
+    for user in others:
+        db.add(Notification(
+            user_id=user.id, event_id=event.id, event_start=event.start, send_at=event.start
+        ))
+    db.commit()
+
+
+def test_update_event_discards_pending_reminders(
+    client: TestClient, db: Session, users: list[User], reloads: list[bool]
+) -> None:
+    creator, participant = users
+    event = create_random_event(db, creator, participants=[participant])
+    add_reminders(db, event, users)
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+    start = event.start + timedelta(hours=1)
+
+    response = client.put(
+        f"{settings.API_V1_STR}/events/{event.id}",
+        headers=headers,
+        json={"start": start.isoformat(), "end": (start + timedelta(hours=1)).isoformat()},
+    )
+
+    assert response.status_code == 200
+    db.expire_all()
+    # Only the reminder already sent is kept, the pending one is regenerated for the new start
+    remaining = db.exec(select(Notification).where(Notification.event_id == event.id)).all()
+    assert [(notification.user_id, notification.sent) for notification in remaining] == [(creator.id, True)]
+    assert reloads == [True]
+
+
+def test_delete_event_discards_pending_reminders(
+    client: TestClient, db: Session, users: list[User], reloads: list[bool]
+) -> None:
+    creator, participant = users
+    event = create_random_event(db, creator, participants=[participant])
+    add_reminders(db, event, users)
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+
+    event_id = event.id
+
+    response = client.delete(f"{settings.API_V1_STR}/events/{event_id}", headers=headers)
+
+    assert response.status_code == 200
+    db.expire_all()
+    pending = db.exec(
+        select(Notification).where(Notification.event_id == event_id, Notification.sent == False)  # noqa: E712
+    ).all()
+    assert pending == []
+    assert reloads == [True]
+
+
+@pytest.fixture
+def chat(db: Session, users: list[User]) -> tuple[Event, list[Message]]:
+    """An event with five messages, the second and third sent at the same moment."""
+    creator, _ = users
+    event = create_random_event(db, creator)
+    start = datetime(2024, 5, 1, 12, 0)
+    timestamps = [start, start + timedelta(minutes=1), start + timedelta(minutes=1),
+                  start + timedelta(minutes=2), start + timedelta(minutes=3)]
+    messages = [
+        Message(content=f"message {i}", event_id=event.id, user_id=creator.id, full_name="Test User", timestamp=timestamp)
+        for i, timestamp in enumerate(timestamps)
+    ]
+    db.add_all(messages)
+    db.commit()
+    for message in messages:
+        db.refresh(message)
+    # Ties on the timestamp are broken by id
+    return event, sorted(messages, key=lambda message: (message.timestamp, message.id))
+
+
+def read_messages(client: TestClient, headers: dict[str, str], event: Event, **params) -> dict:
+    response = client.get(f"{settings.API_V1_STR}/events/{event.id}/messages", headers=headers, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def ids(page: dict) -> list[str]:
+    return [message["id"] for message in page["data"]]
+
+
+def test_messages_cursor_round_trip(
+    client: TestClient, db: Session, users: list[User], chat: tuple[Event, list[Message]]
+) -> None:
+    event, messages = chat
+    headers = authentication_token_from_email(client=client, email=users[0].email, db=db)
+
+    page = read_messages(client, headers, event, limit=2)
+    seen = ids(page)
+    assert page["count"] == 5
+    while page["next_cursor"]:
+        page = read_messages(client, headers, event, limit=2, cursor=page["next_cursor"])
+        seen += ids(page)
+
+    assert seen == [str(message.id) for message in messages]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/events/{event.id}/messages", headers=headers, params={"cursor": "not a cursor"}
+    )
+    assert response.status_code == 400
+
+
+def test_messages_before_and_after(
+    client: TestClient, db: Session, users: list[User], chat: tuple[Event, list[Message]]
+) -> None:
+    event, messages = chat
+    headers = authentication_token_from_email(client=client, email=users[0].email, db=db)
+    expected = [str(message.id) for message in messages]
+
+    page = read_messages(client, headers, event, after=messages[1].timestamp.isoformat())
+    assert ids(page) == expected[3:]
+
+    # The latest page before the moment, oldest first, the cursor continues with older messages
+    page = read_messages(client, headers, event, before=messages[4].timestamp.isoformat(), limit=2)
+    assert ids(page) == expected[2:4]
+    assert page["count"] == 4
+    page = read_messages(
+        client, headers, event, before=messages[4].timestamp.isoformat(), limit=2, cursor=page["next_cursor"]
+    )
+    assert ids(page) == expected[:2]
+
+
+def test_messages_since_id(
+    client: TestClient, db: Session, users: list[User], chat: tuple[Event, list[Message]]
+) -> None:
+    event, messages = chat
+    headers = authentication_token_from_email(client=client, email=users[0].email, db=db)
+
+    # Includes the message sent at the same moment that sorts after it
+    page = read_messages(client, headers, event, since_id=str(messages[1].id))
+    assert ids(page) == [str(message.id) for message in messages[2:]]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/events/{event.id}/messages", headers=headers, params={"since_id": str(uuid.uuid4())}
+    )
+    assert response.status_code == 404
+
+
+def test_messages_since_buffered_message(
+    client: TestClient,
+    db: Session,
+    users: list[User],
+    chat: tuple[Event, list[Message]],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    event, messages = chat
+    creator, _ = users
+    writer = MessageWriteBehind()
+    monkeypatch.setattr(events, "message_writer", writer)
+    # Not stored yet, later than every stored message
+    buffered = asyncio.run(writer.add(MessageCreate(
+        content="buffered", event_id=event.id, user_id=creator.id, full_name="Test User",
+        timestamp=messages[-1].timestamp + timedelta(minutes=1),
+    )))
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+
+    page = read_messages(client, headers, event, since_id=buffered["id"])
+    assert page["data"] == []
+
+    page = read_messages(client, headers, event, since_id=str(messages[3].id))
+    assert ids(page) == [str(messages[4].id)]
+
+
+def test_empty_messages_page_count(
+    client: TestClient, db: Session, users: list[User], chat: tuple[Event, list[Message]]
+) -> None:
+    event, messages = chat
+    headers = authentication_token_from_email(client=client, email=users[0].email, db=db)
+
+    page = read_messages(client, headers, event, after=messages[-1].timestamp.isoformat())
+    assert (page["data"], page["count"], page["next_cursor"]) == ([], 0, None)
+
+    # Past the last message the count still covers every message
+    page = read_messages(client, headers, event, skip=10)
+    assert (page["data"], page["count"]) == ([], 5)
+
+
+@pytest.mark.usefixtures("reloads")
+def test_series_rewrite_deletes_only_its_own_occurrences(
+    client: TestClient, db: Session, users: list[User]
+) -> None:
+    creator, _ = users
+    category = create_random_category(db, creator)
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+    start = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    series_ids = []
+    for _ in range(2):
+        response = client.post(f"{settings.API_V1_STR}/events/", headers=headers, json={
+            "title": "Standup",
+            "start": start.isoformat(),
+            "end": (start + timedelta(minutes=15)).isoformat(),
+            "type": EventType.MEETING,
+            "repeat_type": "daily",
+            "repeat_step": 1,
+            "max_repeats_count": 3,
+            "category_id": str(category.id),
+        })
+        assert response.status_code == 200
+        series_ids.append(response.json()["id"])
+    rewritten, untouched = series_ids
+
+    response = client.put(f"{settings.API_V1_STR}/events/{rewritten}", headers=headers, json={
+        "repeat_type": "daily", "repeat_step": 2, "max_repeats_count": 2
+    })
+
+    assert response.status_code == 200
+    db.expire_all()
+    starts = {
+        series_id: db.exec(
+            select(Event.start).where(Event.recurring_parent_id == series_id).order_by(Event.start)
+        ).all()
+        for series_id in series_ids
+    }
+    assert starts[rewritten] == [start + timedelta(days=2), start + timedelta(days=4)]
+    assert starts[untouched] == [start + timedelta(days=day) for day in (1, 2, 3)]
+
+
+def test_zero_length_events_in_window(client: TestClient, db: Session, users: list[User]) -> None:
+    creator, _ = users
+    window_start = datetime(2031, 3, 1, 9, 0)
+    window_end = window_start + timedelta(hours=8)
+    zero = timedelta(0)
+    listed = [
+        create_random_event(db, creator, start=window_start, duration=zero),
+        create_random_event(db, creator, start=window_start + timedelta(hours=2), duration=zero),
+        create_random_event(db, creator, start=window_start + timedelta(hours=3)),
+        create_random_event(db, creator, start=window_end, duration=zero),
+    ]
+    # Past the window, and crossing its start
+    create_random_event(db, creator, start=window_end + timedelta(hours=1), duration=zero)
+    create_random_event(db, creator, start=window_start - timedelta(minutes=30))
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+
+    response = client.get(f"{settings.API_V1_STR}/events/", headers=headers, params={
+        "start_date": window_start.isoformat(), "end_date": window_end.isoformat()
+    })
+
+    assert response.status_code == 200
+    assert [event["id"] for event in response.json()["data"]] == [str(event.id) for event in listed]
+
+    # Zero-length events take no time, the other two make their hours busy
+    response = client.post(f"{settings.API_V1_STR}/events/availability-matrix", headers=headers, json={
+        "participant_ids": [],
+        "start_date": window_start.isoformat(),
+        "end_date": window_end.isoformat(),
+        "bucket_minutes": 60,
+    })
+
+    assert response.status_code == 200
+    assert [bucket["busy_count"] for bucket in response.json()["buckets"]] == [1, 0, 0, 1, 0, 0, 0, 0]
+
+
+def test_events_visible_through_participation_or_categories(
+    client: TestClient, db: Session, users: list[User]
+) -> None:
+    creator, viewer = users
+    start = datetime(2031, 4, 1, 9, 0)
+    visible = [
+        create_random_event(db, creator, start=start, participants=[viewer]),
+        create_random_event(
+            db, creator, start=start + timedelta(hours=1),
+            category=create_random_category(db, creator, participants=[viewer]),
+        ),
+        create_random_event(
+            db, creator, start=start + timedelta(hours=2), category=create_random_category(db, viewer)
+        ),
+    ]
+    create_random_event(db, creator, start=start + timedelta(hours=3))
+    create_random_event(
+        db, creator, start=start + timedelta(hours=4), category=create_random_category(db, creator)
+    )
+    headers = authentication_token_from_email(client=client, email=viewer.email, db=db)
+
+    response = client.get(f"{settings.API_V1_STR}/events/", headers=headers, params={
+        "start_date": start.isoformat(), "end_date": (start + timedelta(days=1)).isoformat()
+    })
+
+    assert response.status_code == 200
+    page = response.json()
+    assert [event["id"] for event in page["data"]] == [str(event.id) for event in visible]
+    assert page["count"] == 3
+
+
+def test_virtual_series_pages_merge_with_stored_events(
+    client: TestClient, db: Session, users: list[User]
+) -> None:
+    creator, _ = users
+    day = datetime(2031, 5, 1)
+    create_random_event(
+        db, creator, start=day + timedelta(hours=9),
+        repeat_type=RepeatType.daily, repeat_step=1, max_repeats_count=3, repeat_virtual=True,
+    )
+    for start in (day + timedelta(hours=12), day + timedelta(days=1, hours=12), day + timedelta(days=2, hours=8)):
+        create_random_event(db, creator, start=start)
+    expected = sorted([
+        *(day + timedelta(days=index, hours=9) for index in range(4)),
+        day + timedelta(hours=12), day + timedelta(days=1, hours=12), day + timedelta(days=2, hours=8),
+    ])
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+    window = {"start_date": day.isoformat(), "end_date": (day + timedelta(days=7)).isoformat()}
+
+    def read_events(**params) -> dict:
+        response = client.get(f"{settings.API_V1_STR}/events/", headers=headers, params={**window, **params})
+        assert response.status_code == 200
+        return response.json()
+
+    page = read_events(limit=3)
+    assert page["count"] == 7
+    by_cursor = page["data"]
+    while page["next_cursor"]:
+        page = read_events(limit=3, cursor=page["next_cursor"])
+        by_cursor += page["data"]
+    by_skip = [event for skip in (0, 3, 6) for event in read_events(limit=3, skip=skip)["data"]]
+
+    assert [datetime.fromisoformat(event["start"]) for event in by_cursor] == expected
+    assert by_skip == by_cursor
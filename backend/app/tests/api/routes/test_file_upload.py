@@ -0,0 +1,169 @@
+import hashlib
+import os
+import uuid
+from collections.abc import Generator
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.security import create_download_token
+from app.files import resumable
+from app.files.resumable import claim_upload, release_upload
+from app.files.storage import blob_store
+from app.models import UploadedFile, User
+from app.tests.utils.event import create_random_event, delete_users
+from app.tests.utils.user import authentication_token_from_email, create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keeps blobs and resumable uploads of the tests out of the upload directory."""
+    monkeypatch.setattr(blob_store, "root", str(tmp_path))
+    monkeypatch.setattr(blob_store, "temp_directory", str(tmp_path / "tmp"))
+    monkeypatch.setattr(resumable, "RESUMABLE_DIRECTORY", str(tmp_path / "resumable"))
+
+
+@pytest.fixture
+def users(db: Session) -> Generator[list[User], None, None]:
+    users = [create_random_user(db) for _ in range(2)]
+    yield users
+    delete_users(db, users)
+
+
+def test_upload_and_delete_file(client: TestClient, db: Session, users: list[User]) -> None:
+    creator, _ = users
+    event = create_random_event(db, creator)
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+    content = random_lower_string().encode()
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    response = client.post(
+        f"{settings.API_V1_STR}/uploadfile/",
+        params={"event_id": str(event.id)},
+        headers=headers,
+        files={"file": ("notes.txt", content, "text/plain")},
+    )
+
+    assert response.status_code == 201
+    [uploaded_file] = db.exec(select(UploadedFile).where(UploadedFile.event_id == event.id)).all()
+    assert (uploaded_file.sha256, uploaded_file.size) == (sha256, len(content))
+    with open(blob_store.path(sha256), "rb") as blob:
+        assert blob.read() == content
+
+    file_id = uploaded_file.id
+
+    response = client.delete(f"{settings.API_V1_STR}/uploadfile/{file_id}", headers=headers)
+
+    assert response.status_code == 204
+    db.expire_all()
+    assert db.get(UploadedFile, file_id) is None
+    assert not os.path.exists(blob_store.path(sha256))
+
+
+def test_claimed_resumable_upload_is_completed_once(client: TestClient, db: Session, users: list[User]) -> None:
+    creator, _ = users
+    event = create_random_event(db, creator)
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+    content = random_lower_string().encode()
+    response = client.post(
+        f"{settings.API_V1_STR}/uploads/",
+        headers=headers,
+        json={"event_id": str(event.id), "filename": "notes.txt", "size": len(content)},
+    )
+    upload_id = response.json()["id"]
+    response = client.put(
+        f"{settings.API_V1_STR}/uploads/{upload_id}", params={"offset": 0}, headers=headers, content=content
+    )
+    assert response.status_code == 204
+
+    # Stands for a concurrent request completing it
+    assert claim_upload(upload_id)
+    response = client.post(f"{settings.API_V1_STR}/uploads/{upload_id}/complete", headers=headers)
+    assert response.status_code == 404
+
+    release_upload(upload_id)
+    response = client.post(f"{settings.API_V1_STR}/uploads/{upload_id}/complete", headers=headers)
+    assert response.status_code == 201
+    files = db.exec(select(UploadedFile).where(UploadedFile.event_id == event.id)).all()
+    assert [file.filename for file in files] == ["notes.txt"]
+
+
+@pytest.fixture
+def stored_file(db: Session, users: list[User]) -> UploadedFile:
+    """An image with its preview, uploaded by the first user to their event."""
+    creator, _ = users
+    event = create_random_event(db, creator)
+    content = random_lower_string().encode()
+    sha256 = hashlib.sha256(content).hexdigest()
+    os.makedirs(os.path.dirname(blob_store.path(sha256)))
+    Path(blob_store.path(sha256)).write_bytes(content)
+    Path(blob_store.preview_path(sha256)).write_bytes(content)
+    uploaded_file = UploadedFile(
+        filename="photo.jpg", file_url="", event_id=event.id, user_id=creator.id, sha256=sha256, size=len(content)
+    )
+    db.add(uploaded_file)
+    db.commit()
+    db.refresh(uploaded_file)
+    return uploaded_file
+
+
+@pytest.mark.parametrize("suffix", ["", "/preview"])
+def test_downloads_require_event_participation(
+    client: TestClient, db: Session, users: list[User], stored_file: UploadedFile, suffix: str
+) -> None:
+    creator, outsider = users
+    url = f"{settings.API_V1_STR}/files/{stored_file.id}{suffix}"
+
+    outsider_headers = authentication_token_from_email(client=client, email=outsider.email, db=db)
+    response = client.get(url, headers=outsider_headers)
+    assert response.status_code == 403
+
+    creator_headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+    response = client.get(url, headers=creator_headers)
+    assert response.status_code == 200
+    with open(blob_store.path(stored_file.sha256), "rb") as blob:
+        assert response.content == blob.read()
+
+
+def test_listed_files_have_signed_urls(
+    client: TestClient, db: Session, users: list[User], stored_file: UploadedFile
+) -> None:
+    creator, outsider = users
+    headers = authentication_token_from_email(client=client, email=creator.email, db=db)
+
+    response = client.get(f"{settings.API_V1_STR}/events/{stored_file.event_id}/files", headers=headers)
+
+    assert response.status_code == 200
+    [listed] = response.json()
+    # Reachable without the Authorization header, like from <a>, <img> or <video>
+    response = client.get(listed["file_url"], headers={"Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.headers["etag"] == f'"{stored_file.sha256}"'
+    assert client.get(listed["preview_url"]).status_code == 200
+
+    outsider_headers = authentication_token_from_email(client=client, email=outsider.email, db=db)
+    response = client.get(f"{settings.API_V1_STR}/events/{stored_file.event_id}/files", headers=outsider_headers)
+    assert response.status_code == 403
+
+
+def test_download_tokens_are_bound_to_their_file(
+    client: TestClient, users: list[User], stored_file: UploadedFile
+) -> None:
+    creator, _ = users
+    other_file = create_download_token(uuid.uuid4(), creator.id, timedelta(minutes=1))
+    expired = create_download_token(stored_file.id, creator.id, timedelta(minutes=-1))
+    url = f"{settings.API_V1_STR}/files/{stored_file.id}"
+
+    assert client.get(url, params={"token": other_file}).status_code == 403
+    assert client.get(url, params={"token": expired}).status_code == 403
+    assert client.get(url).status_code == 401
+
+    # Not accepted as an access token either
+    token = create_download_token(stored_file.id, creator.id, timedelta(minutes=1))
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
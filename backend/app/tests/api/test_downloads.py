@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api.downloads import file_download
+
+
+def download_client(path: Path) -> TestClient:
+    app = FastAPI()
+
+    @app.api_route("/download", methods=["GET", "HEAD"])
+    def download(request: Request):
+        return file_download(request, str(path), "talk%20recording.mp4", "private, no-cache", '"abc"')
+
+    return TestClient(app)
+
+
+def test_range_requests(tmp_path: Path) -> None:
+    content = os.urandom(5000)
+    path = tmp_path / "blob"
+    path.write_bytes(content)
+    client = download_client(path)
+
+    r = client.get("/download")
+    assert r.status_code == 200
+    assert r.content == content
+    assert r.headers["content-type"] == "video/mp4"
+    assert r.headers["accept-ranges"] == "bytes"
+
+    r = client.get("/download", headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206
+    assert r.headers["content-range"] == "bytes 100-199/5000"
+    assert r.content == content[100:200]
+
+    r = client.get("/download", headers={"Range": "bytes=-10"})
+    assert r.status_code == 206
+    assert r.content == content[-10:]
+
+    r = client.get("/download", headers={"Range": "bytes=9000-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == "bytes */5000"
+
+    # A last position before the first makes the range invalid, it is ignored
+    r = client.get("/download", headers={"Range": "bytes=100-50"})
+    assert r.status_code == 200
+    assert r.content == content
+
+    # A range of another version of the file is ignored
+    r = client.get("/download", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert r.status_code == 200
+    assert r.content == content
+
+
+def test_conditional_requests(tmp_path: Path) -> None:
+    path = tmp_path / "blob"
+    path.write_bytes(b"slides")
+    client = download_client(path)
+
+    r = client.get("/download")
+    assert r.headers["etag"] == '"abc"'
+    assert r.headers["cache-control"] == "private, no-cache"
+
+    r = client.get("/download", headers={"If-None-Match": '"abc"'})
+    assert r.status_code == 304
+    assert r.content == b""
+
+    r = client.get("/download", headers={"If-Modified-Since": r.headers["last-modified"]})
+    assert r.status_code == 304
+
+    r = client.get("/download", headers={"If-None-Match": '"stale"'})
+    assert r.status_code == 200
+    assert r.content == b"slides"
@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+from sqlmodel import Session
+
+from app.api import permissions
+from app.api.permissions import PermissionCache, UserGrants
+from app.models import EventPermission
+
+
+def test_permission_cache_hits_and_invalidation(monkeypatch: pytest.MonkeyPatch) -> None:
+    user_id = uuid.uuid4()
+    event_id = uuid.uuid4()
+    loads = []
+
+    def load_grants(_session: Session, loaded_user_id: uuid.UUID) -> UserGrants:
+        loads.append(loaded_user_id)
+        return UserGrants(events={event_id: EventPermission.VIEW}, categories={})
+
+    monkeypatch.setattr(permissions, "load_grants", load_grants)
+    cache = PermissionCache(ttl=60)
+
+    assert cache.grants(None, user_id).events == {event_id: EventPermission.VIEW}
+    cache.grants(None, user_id)
+    cache.grants(None, user_id)
+    assert loads == [user_id]
+
+    cache.invalidate(user_id)
+    cache.grants(None, user_id)
+    assert loads == [user_id, user_id]
+    assert cache.stats() == {"hits": 2, "misses": 2, "invalidations": 1, "cached_users": 1}
+
+
+def test_permission_cache_expires(monkeypatch: pytest.MonkeyPatch) -> None:
+    loads = []
+    monkeypatch.setattr(
+        permissions,
+        "load_grants",
+        lambda _session, user_id: loads.append(user_id) or UserGrants(events={}, categories={}),
+    )
+    cache = PermissionCache(ttl=0)
+
+    user_id = uuid.uuid4()
+    cache.grants(None, user_id)
+    cache.grants(None, user_id)
+    assert len(loads) == 2
@@ -0,0 +1,58 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api import uploads
+from app.api.uploads import stream_upload
+
+BOUNDARY = "upload-boundary"
+
+
+def multipart_request(content: bytes, chunk_size: int = 4096) -> Request:
+    body = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="note"\r\n\r\n'
+        "not a file\r\n"
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="slides.pdf"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive() -> dict:
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())],
+    }
+    return Request(scope, receive)
+
+
+def test_stream_upload_writes_file_part(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(uploads, "UPLOAD_WRITE_SIZE", 10_000)
+    content = os.urandom(100_000)
+
+    upload = asyncio.run(stream_upload(multipart_request(content), str(tmp_path)))
+
+    assert upload.filename == "slides.pdf"
+    assert upload.content_type == "application/pdf"
+    assert upload.size == len(content)
+    assert upload.sha256 == hashlib.sha256(content).hexdigest()
+    assert Path(upload.path).read_bytes() == content
+
+
+def test_stream_upload_stops_at_size_limit(tmp_path: Path) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(stream_upload(multipart_request(b"x" * 50_000), str(tmp_path), max_size=10_000))
+
+    assert exc_info.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,119 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+from app.chat import store
+from app.chat.store import MessageWriteBehind
+from app.models import MessageCreate
+
+
+def make_message(event_id: uuid.UUID, content: str) -> MessageCreate:
+    return MessageCreate(
+        content=content, event_id=event_id, user_id=uuid.uuid4(), full_name="Test User"
+    )
+
+
+def test_messages_are_batched_and_flushed_on_stop(monkeypatch: pytest.MonkeyPatch) -> None:
+    batches: list[list[dict]] = []
+    monkeypatch.setattr(store, "insert_messages", batches.append)
+    event_id = uuid.uuid4()
+    writer = MessageWriteBehind()
+
+    async def scenario() -> list[dict]:
+        writer.start()
+        first = [await writer.add(make_message(event_id, f"message {i}")) for i in range(3)]
+        await asyncio.sleep(store.MESSAGE_FLUSH_INTERVAL * 4)
+        last = await writer.add(make_message(event_id, "last"))
+        await writer.stop()
+        return first + [last]
+
+    payloads = asyncio.run(scenario())
+
+    assert [len(batch) for batch in batches] == [3, 1]
+    stored = [row for batch in batches for row in batch]
+    assert [str(row["id"]) for row in stored] == [payload["id"] for payload in payloads]
+    assert [row["content"] for row in stored] == ["message 0", "message 1", "message 2", "last"]
+
+
+def test_failed_batch_is_kept(monkeypatch: pytest.MonkeyPatch) -> None:
+    attempts: list[int] = []
+
+    def insert_messages(rows: list[dict]) -> None:
+        attempts.append(len(rows))
+        if len(attempts) == 1:
+            raise ConnectionError("database is down")
+
+    monkeypatch.setattr(store, "insert_messages", insert_messages)
+    writer = MessageWriteBehind()
+
+    async def scenario() -> None:
+        await writer.add(make_message(uuid.uuid4(), "hello"))
+        assert not await writer.flush()
+        await writer.add(make_message(uuid.uuid4(), "again"))
+        assert await writer.flush()
+
+    asyncio.run(scenario())
+    assert attempts == [1, 2]
+
+
+def test_buffered_message_is_found_until_stored(monkeypatch: pytest.MonkeyPatch) -> None:
+    found: list[bool] = []
+    writer = MessageWriteBehind()
+
+    def insert_messages(rows: list[dict]) -> None:
+        # The batch is still found while it is being stored
+        found.append(writer.find(rows[0]["id"]) is not None)
+
+    monkeypatch.setattr(store, "insert_messages", insert_messages)
+
+    async def scenario() -> uuid.UUID:
+        payload = await writer.add(make_message(uuid.uuid4(), "hello"))
+        message_id = uuid.UUID(payload["id"])
+        assert writer.find(message_id).content == "hello"
+        await writer.flush()
+        return message_id
+
+    message_id = asyncio.run(scenario())
+    assert found == [True]
+    assert writer.find(message_id) is None
+
+
+def test_stop_lets_the_running_flush_finish(monkeypatch: pytest.MonkeyPatch) -> None:
+    stored: list[str] = []
+
+    def insert_messages(rows: list[dict]) -> None:
+        time.sleep(0.2)
+        stored.extend(row["content"] for row in rows)
+
+    monkeypatch.setattr(store, "insert_messages", insert_messages)
+    writer = MessageWriteBehind()
+
+    async def scenario() -> None:
+        writer.start()
+        await writer.add(make_message(uuid.uuid4(), "in flight"))
+        # Stop while the loop is storing the batch
+        await asyncio.sleep(store.MESSAGE_FLUSH_INTERVAL * 2)
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert stored == ["in flight"]
+
+
+def test_add_waits_while_the_buffer_is_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(store, "MESSAGE_BUFFER_LIMIT", 2)
+    monkeypatch.setattr(store, "insert_messages", lambda rows: None)
+    writer = MessageWriteBehind()
+
+    async def scenario() -> None:
+        writer.start()
+        await writer.add(make_message(uuid.uuid4(), "first"))
+        await writer.add(make_message(uuid.uuid4(), "second"))
+        third = asyncio.create_task(writer.add(make_message(uuid.uuid4(), "third")))
+        await asyncio.sleep(0)
+        assert not third.done()
+        await asyncio.wait_for(third, 1)
+        await writer.stop()
+
+    asyncio.run(scenario())
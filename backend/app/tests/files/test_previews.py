@@ -0,0 +1,60 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.files import previews
+from app.files.previews import (
+    PREVIEW_SIZE,
+    PreviewPipeline,
+    preview_kind,
+    render_preview,
+)
+from app.files.storage import BlobStore
+
+
+def test_preview_kind() -> None:
+    assert preview_kind("holiday%20photo.JPG") == "image"
+    assert preview_kind("agenda.pdf") == "pdf"
+    assert preview_kind("diagram.svg") is None
+    assert preview_kind("notes.txt") is None
+
+
+def test_render_image_and_pdf_previews(tmp_path: Path) -> None:
+    image_path = tmp_path / "photo.png"
+    Image.new("RGBA", (2000, 1000), (200, 30, 30, 255)).save(image_path)
+    pdf_path = tmp_path / "slides.pdf"
+    Image.new("RGB", (1240, 1754), "white").save(pdf_path, "PDF")
+
+    render_preview(str(image_path), str(tmp_path / "photo.jpg"), "image")
+    render_preview(str(pdf_path), str(tmp_path / "slides.jpg"), "pdf")
+
+    with Image.open(tmp_path / "photo.jpg") as preview:
+        assert preview.format == "JPEG"
+        assert preview.size == (PREVIEW_SIZE, PREVIEW_SIZE // 2)
+    with Image.open(tmp_path / "slides.jpg") as preview:
+        assert max(preview.size) <= PREVIEW_SIZE
+
+
+def test_pipeline_caches_preview_next_to_blob(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr(previews, "blob_store", store)
+    source = tmp_path / "upload.png"
+    Image.new("RGB", (800, 600), "blue").save(source)
+    sha256 = hashlib.sha256(source.read_bytes()).hexdigest()
+    store.add(str(source), sha256)
+    pipeline = PreviewPipeline(workers=1)
+
+    async def scenario() -> None:
+        pipeline.schedule(sha256, "upload.png")
+        while pipeline._rendering:
+            await asyncio.sleep(0.05)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pipeline.shutdown()
+    assert os.path.exists(store.preview_path(sha256))
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.files import resumable
+from app.files.resumable import (
+    assemble_upload,
+    chunk_allowance,
+    chunk_directory,
+    claim_upload,
+    clean_expired_uploads,
+    commit_chunk,
+    create_upload,
+    load_upload,
+    missing_ranges,
+    release_upload,
+)
+
+
+def put_chunk(upload_id: str, offset: int, data: bytes) -> None:
+    temp_path = os.path.join(chunk_directory(upload_id), "chunk.part")
+    Path(temp_path).write_bytes(data)
+    commit_chunk(upload_id, temp_path, offset)
+
+
+def test_chunks_in_any_order_assemble_the_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(resumable, "RESUMABLE_DIRECTORY", str(tmp_path / "resumable"))
+    content = os.urandom(10_000)
+    upload = create_upload(uuid.uuid4(), uuid.uuid4(), "recording.mp4", len(content))
+    assert load_upload(uuid.UUID(upload.id)) == upload
+
+    put_chunk(upload.id, 6000, content[6000:8000])
+    put_chunk(upload.id, 0, content[:4000])
+    assert missing_ranges(upload) == [(4000, 6000), (8000, 10_000)]
+
+    # A retried chunk overlapping the ones already received
+    put_chunk(upload.id, 3000, content[3000:7000])
+    put_chunk(upload.id, 8000, content[8000:])
+    assert missing_ranges(upload) == []
+
+    path, sha256 = assemble_upload(upload, str(tmp_path / "tmp"))
+    assert Path(path).read_bytes() == content
+    assert sha256 == hashlib.sha256(content).hexdigest()
+
+
+def test_stored_chunks_are_limited_to_the_file_size_and_one_chunk(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(resumable, "RESUMABLE_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(resumable, "MAX_CHUNK_SIZE", 4000)
+    upload = create_upload(uuid.uuid4(), uuid.uuid4(), "recording.mp4", 10_000)
+    assert chunk_allowance(upload, 0) == 4000
+    assert chunk_allowance(upload, 9000) == 1000
+
+    # Overlapping chunks, 12 000 bytes stored for a 10 000 byte file
+    for offset in (0, 2000, 4000):
+        put_chunk(upload.id, offset, os.urandom(4000))
+    assert chunk_allowance(upload, 6000) == 2000
+    # Replacing a stored chunk doesn't count it twice
+    assert chunk_allowance(upload, 4000) == 4000
+
+    put_chunk(upload.id, 6000, os.urandom(2000))
+    assert chunk_allowance(upload, 8000) == 0
+
+
+def test_expired_uploads_are_removed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(resumable, "RESUMABLE_DIRECTORY", str(tmp_path))
+    stale = create_upload(uuid.uuid4(), uuid.uuid4(), "stale.bin", 10)
+    fresh = create_upload(uuid.uuid4(), uuid.uuid4(), "fresh.bin", 10)
+    os.utime(tmp_path / stale.id, (0, 0))
+
+    assert clean_expired_uploads(ttl=3600) == 1
+    assert load_upload(uuid.UUID(stale.id)) is None
+    assert load_upload(uuid.UUID(fresh.id)) == fresh
+
+
+def test_an_upload_is_claimed_by_one_completion(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(resumable, "RESUMABLE_DIRECTORY", str(tmp_path))
+    upload = create_upload(uuid.uuid4(), uuid.uuid4(), "recording.mp4", 10_000)
+
+    assert claim_upload(upload.id)
+    assert not claim_upload(upload.id)
+    assert load_upload(uuid.UUID(upload.id)) is None
+
+    # A failed completion can be retried
+    release_upload(upload.id)
+    assert load_upload(uuid.UUID(upload.id)) == upload
+    assert claim_upload(upload.id)
@@ -0,0 +1,27 @@
+import hashlib
+from pathlib import Path
+
+from app.files.storage import BlobStore
+
+
+def write_temp(store: BlobStore, name: str, content: bytes) -> str:
+    path = Path(store.temp_directory)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / name).write_bytes(content)
+    return str(path / name)
+
+
+def test_identical_content_is_stored_once(tmp_path: Path) -> None:
+    store = BlobStore(str(tmp_path))
+    content = b"quarterly slides"
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    assert store.add(write_temp(store, "first.part", content), sha256)
+    assert not store.add(write_temp(store, "second.part", content), sha256)
+
+    assert store.relative_path(sha256) == f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+    assert Path(store.path(sha256)).read_bytes() == content
+    assert list(Path(store.temp_directory).iterdir()) == []
+
+    store.remove(sha256)
+    assert not Path(store.path(sha256)).exists()
@@ -0,0 +1,163 @@
+import uuid
+from collections.abc import Generator
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.models import Notification, RepeatType, User
+from app.notifications.events_check import (
+    generate_notifications_from_upcoming_events,
+    get_pending_send_times,
+    get_upcoming_notifications,
+)
+from app.tests.utils.event import create_random_event, delete_users
+from app.tests.utils.user import create_random_user
+
+
+@pytest.fixture
+def users(db: Session) -> Generator[list[User], None, None]:
+    users = [create_random_user(db) for _ in range(2)]
+    yield users
+    delete_users(db, users)
+
+
+def notifications_of(db: Session, event_id: uuid.UUID) -> list[Notification]:
+    db.expire_all()
+    return list(db.exec(
+        select(Notification).where(Notification.event_id == event_id).order_by(Notification.user_id)
+    ).all())
+
+
+def test_regeneration_is_idempotent(db: Session, users: list[User]) -> None:
+    creator, participant = users
+    start = datetime.now().replace(microsecond=0) + timedelta(minutes=2)
+    event = create_random_event(db, creator, start=start, participants=[participant])
+
+    generate_notifications_from_upcoming_events(db, horizon=timedelta(minutes=5))
+    first = notifications_of(db, event.id)
+    generate_notifications_from_upcoming_events(db, horizon=timedelta(minutes=5))
+    second = notifications_of(db, event.id)
+
+    # One row per participant and occurrence, kept by the unique index on regeneration
+    assert sorted(notification.user_id for notification in first) == sorted(user.id for user in users)
+    assert [notification.id for notification in second] == [notification.id for notification in first]
+    assert all(notification.event_start == start and not notification.sent for notification in second)
+
+
+def test_virtual_series_occurrences_are_expanded(db: Session, users: list[User]) -> None:
+    creator, _ = users
+    # Started yesterday, the next occurrence begins in two minutes
+    first_start = datetime.now().replace(microsecond=0) + timedelta(minutes=2) - timedelta(days=1)
+    series = create_random_event(
+        db,
+        creator,
+        start=first_start,
+        repeat_type=RepeatType.daily,
+        repeat_step=1,
+        max_repeats_count=5,
+        repeat_virtual=True,
+    )
+
+    generate_notifications_from_upcoming_events(db, horizon=timedelta(minutes=5))
+
+    notifications = notifications_of(db, series.id)
+    assert [(notification.user_id, notification.event_start) for notification in notifications] == [
+        (creator.id, first_start + timedelta(days=1))
+    ]
+
+
+def test_unclaimable_notifications_are_not_scheduled(db: Session, users: list[User]) -> None:
+    creator, participant = users
+    now = datetime.now().replace(microsecond=0)
+    event = create_random_event(db, creator, start=now + timedelta(minutes=3), participants=[participant])
+    due = now - timedelta(seconds=7)
+    orphaned = now - timedelta(seconds=11)
+    db.add(Notification(user_id=participant.id, event_id=event.id, event_start=event.start, send_at=due))
+    # Left behind by a deleted user and a deleted event, nothing can claim them
+    db.add(Notification(user_id=uuid.uuid4(), event_id=event.id, event_start=event.start, send_at=orphaned))
+    db.add(Notification(user_id=participant.id, event_id=uuid.uuid4(), event_start=event.start, send_at=orphaned))
+    db.commit()
+
+    send_times = get_pending_send_times(db, now + timedelta(minutes=5))
+
+    assert due in send_times
+    assert orphaned not in send_times
+
+
+def test_reminder_offsets_fall_back_from_event_to_user_to_defaults(db: Session, users: list[User]) -> None:
+    creator, participant = users
+    participant.reminder_offsets = [1]
+    db.add(participant)
+    db.commit()
+    start = datetime.now().replace(microsecond=0) + timedelta(minutes=2, seconds=30)
+    event = create_random_event(db, creator, start=start, participants=[participant])
+    overridden = create_random_event(
+        db, creator, start=start, participants=[participant], reminder_offsets=[0]
+    )
+
+    generate_notifications_from_upcoming_events(db, horizon=timedelta(minutes=5))
+
+    send_at = {
+        (notification.event_id, notification.user_id): notification.send_at
+        for notification in notifications_of(db, event.id) + notifications_of(db, overridden.id)
+    }
+    # The default offset three minutes before has already passed
+    assert send_at[(event.id, creator.id)] == start - timedelta(minutes=2)
+    assert send_at[(event.id, participant.id)] == start - timedelta(minutes=1)
+    assert send_at[(overridden.id, creator.id)] == start
+    assert send_at[(overridden.id, participant.id)] == start
+
+
+def claimed_for(db: Session, event_id: uuid.UUID) -> list[uuid.UUID]:
+    return [
+        user_id for user_id, data in get_upcoming_notifications(db)
+        if data["event_id"] == str(event_id)
+    ]
+
+
+def test_due_reminder_is_claimed_once(db: Session, users: list[User]) -> None:
+    creator, participant = users
+    now = datetime.now().replace(microsecond=0)
+    event = create_random_event(db, creator, start=now + timedelta(minutes=1, seconds=30))
+    db.add(Notification(user_id=participant.id, event_id=event.id, event_start=event.start, send_at=now))
+    db.commit()
+
+    assert claimed_for(db, event.id) == [participant.id]
+    assert claimed_for(db, event.id) == []
+
+    # Moved on to the next default offset, a minute before the start
+    [notification] = notifications_of(db, event.id)
+    assert notification.send_at == event.start - timedelta(minutes=1)
+    assert not notification.sent
+
+
+def test_locked_reminder_is_skipped_by_concurrent_claims(db: Session, users: list[User]) -> None:
+    creator, participant = users
+    now = datetime.now().replace(microsecond=0)
+    event = create_random_event(db, creator, start=now + timedelta(minutes=1, seconds=30))
+    db.add(Notification(user_id=participant.id, event_id=event.id, event_start=event.start, send_at=now))
+    db.commit()
+
+    with Session(engine) as other:
+        other.exec(select(Notification).where(Notification.event_id == event.id).with_for_update()).all()
+        assert claimed_for(db, event.id) == []
+        other.rollback()
+
+    assert claimed_for(db, event.id) == [participant.id]
+
+
+def test_last_reminder_marks_notification_sent(db: Session, users: list[User]) -> None:
+    creator, _ = users
+    now = datetime.now().replace(microsecond=0)
+    event = create_random_event(db, creator, start=now - timedelta(seconds=10))
+    db.add(Notification(user_id=creator.id, event_id=event.id, event_start=event.start, send_at=event.start))
+    db.commit()
+
+    assert claimed_for(db, event.id) == [creator.id]
+
+    [notification] = notifications_of(db, event.id)
+    assert notification.sent
+    assert notification.send_at == event.start
+    assert claimed_for(db, event.id) == []
@@ -0,0 +1,94 @@
+import time
+from collections.abc import Generator
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, delete, func, select
+
+from app.api.routes.events import create_recurring_events
+from app.models import (
+    Category,
+    Event,
+    EventCategoryLink,
+    EventCreate,
+    EventParticipant,
+    EventPermission,
+    EventType,
+    RepeatType,
+    User,
+)
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+PARTICIPANTS_COUNT = 5
+
+
+@pytest.fixture
+def series_users(db: Session) -> Generator[tuple[list[User], Category], None, None]:
+    """Participants and a category for a series, removed with everything they created."""
+    users = [create_random_user(db) for _ in range(PARTICIPANTS_COUNT)]
+    category = Category(title=random_lower_string(), owner_id=users[0].id)
+    db.add(category)
+    db.commit()
+
+    yield users, category
+
+    db.rollback()
+    user_ids = [user.id for user in users]
+    db.exec(delete(EventParticipant).where(EventParticipant.user_id.in_(user_ids)))
+    db.exec(delete(EventCategoryLink).where(EventCategoryLink.category_id == category.id))
+    db.exec(delete(Event).where(Event.creator_id == users[0].id))
+    db.exec(delete(Category).where(Category.id == category.id))
+    db.exec(delete(User).where(User.id.in_(user_ids)))
+    db.commit()
+
+
+@pytest.mark.parametrize("occurrences_count", [1_000, 10_000])
+def test_create_recurring_events_benchmark(
+    db: Session, series_users: tuple[list[User], Category], occurrences_count: int
+) -> None:
+    users, category = series_users
+    creator = users[0]
+
+    start = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    event_in = EventCreate(
+        title=random_lower_string(),
+        start=start,
+        end=start + timedelta(minutes=30),
+        type=EventType.MEETING,
+        repeat_type=RepeatType.hourly,
+        repeat_step=1,
+        max_repeats_count=occurrences_count,
+        category_id=category.id,
+    )
+    base_event = Event.model_validate(
+        event_in.model_dump(exclude={"category_id", "participants"}),
+        update={"creator_id": creator.id, "repeat_type": RepeatType.recurring_parent},
+    )
+    db.add(base_event)
+    db.flush()
+    db.add(EventCategoryLink(event_id=base_event.id, category_id=category.id))
+    for user in users:
+        db.add(EventParticipant(
+            event_id=base_event.id,
+            user_id=user.id,
+            is_creator=user.id == creator.id,
+            permissions=EventPermission.ORGANIZE if user.id == creator.id else EventPermission.VIEW,
+        ))
+    db.flush()
+
+    started = time.perf_counter()
+    event_ids = create_recurring_events(db, base_event, event_in, creator)
+    db.commit()
+    elapsed = time.perf_counter() - started
+    print(f"\nCreated series of {occurrences_count} occurrences in {elapsed:.3f}s")
+
+    assert len(event_ids) == occurrences_count
+    participants_count = db.exec(
+        select(func.count()).select_from(EventParticipant).where(EventParticipant.event_id.in_(event_ids))
+    ).one()
+    assert participants_count == occurrences_count * PARTICIPANTS_COUNT
+    links_count = db.exec(
+        select(func.count()).select_from(EventCategoryLink).where(EventCategoryLink.category_id == category.id)
+    ).one()
+    assert links_count == occurrences_count + 1
@@ -0,0 +1,53 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Event, RepeatType
+from app.recurrence.series import (
+    count_occurrences,
+    expand_events,
+    iter_window_occurrences,
+    occurrence_key,
+)
+
+
+def make_series(duration: timedelta, **kwargs) -> Event:
+    start = datetime(2026, 1, 1, 9)
+    return Event(
+        id=uuid.uuid4(),
+        title="Series",
+        type="meeting",
+        creator_id=uuid.uuid4(),
+        start=start,
+        end=start + duration,
+        repeat_type=RepeatType.daily,
+        repeat_step=1,
+        repeat_virtual=True,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("duration", [timedelta(0), timedelta(hours=1)])
+@pytest.mark.parametrize("series_limits", [{}, {"max_repeats_count": 5}, {"repeat_until": datetime(2026, 1, 20, 9)}])
+@pytest.mark.parametrize("window", [
+    (None, datetime(2026, 2, 1)),
+    (datetime(2026, 1, 3, 9), datetime(2026, 1, 10, 9)),
+    (datetime(2026, 1, 3, 10), datetime(2026, 1, 10, 10)),
+])
+def test_count_occurrences_matches_expansion(duration: timedelta, series_limits: dict, window: tuple) -> None:
+    series = make_series(duration, **series_limits)
+    start_date, end_date = window
+    assert count_occurrences(series, start_date, end_date) == len(expand_events([series], start_date, end_date))
+
+
+def test_iter_window_occurrences_resumes_after_position() -> None:
+    series = make_series(timedelta(0), max_repeats_count=10)
+    occurrences = expand_events([series])
+    position = occurrence_key(occurrences[3])
+
+    rest = list(iter_window_occurrences(series, after=position))
+
+    assert [occurrence_key(occurrence) for occurrence in rest] == [
+        occurrence_key(occurrence) for occurrence in occurrences[4:]
+    ]
@@ -0,0 +1,113 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.scheduling.availability import busy_buckets, find_free_slots, merge_intervals
+
+
+def test_merge_intervals() -> None:
+    day = datetime(2025, 1, 1)
+    ranges = [
+        (day.replace(hour=9), day.replace(hour=10)),
+        (day.replace(hour=13), day.replace(hour=14)),
+        (day.replace(hour=9, minute=30), day.replace(hour=11)),
+        (day.replace(hour=11), day.replace(hour=12)),
+        (day.replace(hour=15), day.replace(hour=15)),
+    ]
+    assert merge_intervals(ranges) == [
+        (day.replace(hour=9), day.replace(hour=12)),
+        (day.replace(hour=13), day.replace(hour=14)),
+    ]
+
+
+def test_find_free_slots_granularity() -> None:
+    day = datetime(2025, 1, 1)
+    busy = [(day.replace(hour=9, minute=10), day.replace(hour=9, minute=45))]
+    slots = find_free_slots(
+        busy,
+        day.replace(hour=9),
+        day.replace(hour=10),
+        duration=timedelta(minutes=10),
+        granularity=timedelta(minutes=5),
+    )
+    assert slots == [
+        day.replace(hour=9),
+        day.replace(hour=9, minute=45),
+        day.replace(hour=9, minute=50),
+    ]
+
+
+def test_busy_buckets() -> None:
+    start = datetime(2025, 1, 1, 9)
+    busy = {
+        "alice": [
+            (start + timedelta(minutes=10), start + timedelta(minutes=40)),
+            (start + timedelta(minutes=35), start + timedelta(minutes=60)),
+        ],
+        "bob": [(start - timedelta(hours=1), start + timedelta(minutes=15))],
+        "carol": [],
+    }
+    buckets = busy_buckets(busy, start, start + timedelta(minutes=70), timedelta(minutes=15))
+    assert buckets == [["alice", "bob"], ["alice"], ["alice"], ["alice"], []]
+
+
+def quarter_of_meetings(participants: int, start_date: datetime) -> dict[int, list[tuple[datetime, datetime]]]:
+    """4 meetings every working day over 90 days for each participant."""
+    rng = random.Random(42)
+    busy: dict[int, list[tuple[datetime, datetime]]] = {}
+    for participant in range(participants):
+        ranges = busy[participant] = []
+        for day in range(90):
+            day_start = start_date + timedelta(days=day)
+            if day_start.weekday() >= 5:
+                continue
+            for _ in range(4):
+                meeting_start = day_start + timedelta(hours=rng.randint(8, 17), minutes=rng.choice([0, 30]))
+                ranges.append((meeting_start, meeting_start + timedelta(minutes=rng.choice([30, 60, 90]))))
+    return busy
+
+
+def test_find_free_slots_benchmark() -> None:
+    """50 participants with 4 meetings every working day over a quarter."""
+    start_date = datetime(2025, 1, 1)
+    end_date = start_date + timedelta(days=90)
+    busy = [busy_range for ranges in quarter_of_meetings(50, start_date).values() for busy_range in ranges]
+
+    started = time.perf_counter()
+    slots = find_free_slots(
+        busy,
+        start_date,
+        end_date,
+        duration=timedelta(minutes=60),
+        granularity=timedelta(minutes=15),
+        max_slots=10_000,
+    )
+    elapsed = time.perf_counter() - started
+    print(f"\nFound {len(slots)} slots among {len(busy)} busy ranges in {elapsed:.3f}s")
+
+    assert slots
+    for slot in slots[::50]:
+        slot_end = slot + timedelta(minutes=60)
+        assert slot_end <= end_date
+        assert all(slot_end <= busy_start or slot >= busy_end for busy_start, busy_end in busy)
+
+
+def test_busy_buckets_benchmark() -> None:
+    """A quarter heatmap of 50 participants in 15 minute buckets."""
+    start_date = datetime(2025, 1, 1)
+    end_date = start_date + timedelta(days=90)
+    bucket = timedelta(minutes=15)
+    busy = quarter_of_meetings(50, start_date)
+
+    started = time.perf_counter()
+    buckets = busy_buckets(busy, start_date, end_date, bucket)
+    elapsed = time.perf_counter() - started
+    print(f"\nFilled {len(buckets)} buckets of {len(busy)} participants in {elapsed:.3f}s")
+
+    assert len(buckets) == 90 * 24 * 4
+    for index in range(0, len(buckets), 97):
+        bucket_start = start_date + bucket * index
+        assert buckets[index] == [
+            participant for participant, ranges in busy.items()
+            if any(start < bucket_start + bucket and end > bucket_start for start, end in ranges)
+        ]
@@ -0,0 +1,92 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, col, delete, or_, select
+
+from app.models import (
+    Category,
+    CategoryParticipant,
+    Event,
+    EventCategoryLink,
+    EventParticipant,
+    EventPermission,
+    EventType,
+    Message,
+    Notification,
+    UploadedFile,
+    User,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_category(db: Session, owner: User, *, participants: Iterable[User] = ()) -> Category:
+    """Stores a category of the owner shared with the participants as viewers."""
+    category = Category(title=random_lower_string(), owner_id=owner.id)
+    db.add(category)
+    db.flush()
+    for user in participants:
+        db.add(CategoryParticipant(category_id=category.id, user_id=user.id))
+    db.commit()
+    db.refresh(category)
+    return category
+
+
+def create_random_event(
+    db: Session,
+    creator: User,
+    *,
+    start: datetime | None = None,
+    duration: timedelta = timedelta(hours=1),
+    participants: Iterable[User] = (),
+    category: Category | None = None,
+    **fields,
+) -> Event:
+    """Stores an event with its creator as organizer and the other participants as viewers."""
+    if start is None:
+        start = datetime.now().replace(microsecond=0) + timedelta(days=1)
+    event = Event(
+        title=random_lower_string(),
+        start=start,
+        end=start + duration,
+        type=EventType.MEETING,
+        creator_id=creator.id,
+        **fields,
+    )
+    db.add(event)
+    db.flush()
+    db.add(EventParticipant(
+        event_id=event.id, user_id=creator.id, is_creator=True, permissions=EventPermission.ORGANIZE
+    ))
+    for user in participants:
+        db.add(EventParticipant(event_id=event.id, user_id=user.id))
+    if category is not None:
+        db.add(EventCategoryLink(event_id=event.id, category_id=category.id))
+    db.commit()
+    db.refresh(event)
+    return event
+
+
+def delete_users(db: Session, users: Iterable[User]) -> None:
+    """Removes users with their events, categories and everything pointing at them."""
+    db.rollback()
+    user_ids = [user.id for user in users]
+    event_ids = select(Event.id).where(col(Event.creator_id).in_(user_ids))
+    category_ids = select(Category.id).where(col(Category.owner_id).in_(user_ids))
+    db.exec(delete(Notification).where(or_(
+        col(Notification.user_id).in_(user_ids), col(Notification.event_id).in_(event_ids)
+    )))
+    db.exec(delete(Message).where(col(Message.event_id).in_(event_ids)))
+    db.exec(delete(UploadedFile).where(col(UploadedFile.event_id).in_(event_ids)))
+    db.exec(delete(EventParticipant).where(or_(
+        col(EventParticipant.user_id).in_(user_ids), col(EventParticipant.event_id).in_(event_ids)
+    )))
+    db.exec(delete(EventCategoryLink).where(or_(
+        col(EventCategoryLink.event_id).in_(event_ids), col(EventCategoryLink.category_id).in_(category_ids)
+    )))
+    db.exec(delete(CategoryParticipant).where(or_(
+        col(CategoryParticipant.user_id).in_(user_ids), col(CategoryParticipant.category_id).in_(category_ids)
+    )))
+    db.exec(delete(Event).where(col(Event.creator_id).in_(user_ids)))
+    db.exec(delete(Category).where(col(Category.owner_id).in_(user_ids)))
+    db.exec(delete(User).where(col(User.id).in_(user_ids)))
+    db.commit()
@@ -0,0 +1,106 @@
+import asyncio
+import uuid
+
+from app.websockets import manager as manager_module
+from app.websockets.manager import ConnectionManager
+from app.websockets.pubsub import InMemoryPubSub
+
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False) -> None:
+        self.sent: list[str] = []
+        self.stalled = stalled
+        self.close_code: int | None = None
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, text: str) -> None:
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.sent.append(text)
+
+    async def close(self, code: int) -> None:
+        self.close_code = code
+
+
+def test_fan_out_between_managers() -> None:
+    """Two managers on one backend stand for two workers."""
+    pubsub = InMemoryPubSub()
+    first, second = ConnectionManager(pubsub), ConnectionManager(pubsub)
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    event_id = uuid.uuid4()
+    alice_ws, bob_ws = FakeWebSocket(), FakeWebSocket()
+
+    async def scenario() -> None:
+        await first.connect(alice_ws, alice)
+        await second.connect(bob_ws, bob)
+        first.join_event(alice_ws, str(event_id))
+        second.join_event(bob_ws, str(event_id))
+
+        await first.send_message_to_event(event_id, {"content": "hi"})
+        await second.send_personal_messages([(alice, {"message": "reminder"})])
+        await first.broadcast("hello")
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    assert alice_ws.sent == ['{"content": "hi"}', '{"message": "reminder"}', "hello"]
+    assert bob_ws.sent == ['{"content": "hi"}', "hello"]
+
+
+def test_slow_connection_is_dropped(monkeypatch, caplog) -> None:
+    monkeypatch.setattr(manager_module, "SEND_QUEUE_HIGH_WATER", 4)
+    manager = ConnectionManager(InMemoryPubSub())
+    slow, fast = uuid.uuid4(), uuid.uuid4()
+    slow_ws, fast_ws = FakeWebSocket(stalled=True), FakeWebSocket()
+
+    async def scenario() -> dict:
+        await manager.connect(slow_ws, slow)
+        await manager.connect(fast_ws, fast)
+        for index in range(10):
+            await manager.broadcast(str(index))
+            await asyncio.sleep(0)
+        stats = manager.queue_stats()
+        await asyncio.sleep(0.01)
+        return stats
+
+    stats = asyncio.run(scenario())
+
+    assert fast_ws.sent == [str(index) for index in range(10)]
+    assert slow_ws.close_code is not None
+    assert str(slow) not in manager.user_connections
+    assert stats["dropped_connections"] == 1
+    assert stats["connections"] == 1
+    assert f"Closing connection of user {slow}: send queue is full" in caplog.text
+
+
+def test_multiple_connections_per_user() -> None:
+    manager = ConnectionManager(InMemoryPubSub())
+    user_id = uuid.uuid4()
+    event_id = str(uuid.uuid4())
+    chat_ws, second_tab_ws, echo_ws = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+
+    async def scenario() -> None:
+        for websocket in (chat_ws, second_tab_ws, echo_ws):
+            await manager.connect(websocket, user_id)
+        manager.join_event(chat_ws, event_id)
+        manager.join_event(second_tab_ws, event_id)
+
+        await manager.send_message_to_event(event_id, {"content": "hi"})
+        await manager.send_personal_message({"message": "reminder"}, user_id)
+        await asyncio.sleep(0.01)
+
+        manager.disconnect(chat_ws, user_id)
+        await manager.send_message_to_event(event_id, {"content": "bye"})
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+
+    assert chat_ws.sent == ['{"content": "hi"}', '{"message": "reminder"}']
+    assert second_tab_ws.sent == ['{"content": "hi"}', '{"message": "reminder"}', '{"content": "bye"}']
+    assert echo_ws.sent == ['{"message": "reminder"}']
+    # Serialized once for every connection of the user
+    assert chat_ws.sent[1] is second_tab_ws.sent[1] is echo_ws.sent[0]
+    assert manager.room_connections[event_id] == {second_tab_ws}
+    assert chat_ws not in manager.connection_rooms
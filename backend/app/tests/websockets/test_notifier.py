@@ -0,0 +1,57 @@
+import asyncio
+import random
+
+import pytest
+
+from app.websockets import notifier
+from app.websockets.notifier import LeaderLock, NotificationScheduler
+
+
+@pytest.fixture
+def lock_key() -> int:
+    return random.randint(1, 2**31 - 1)
+
+
+def test_leader_lock_is_exclusive(lock_key: int) -> None:
+    leader, follower = LeaderLock(lock_key), LeaderLock(lock_key)
+
+    assert leader.try_acquire()
+    try:
+        assert leader.is_held()
+        assert not follower.try_acquire()
+        assert not follower.is_held()
+    finally:
+        leader.release()
+
+    assert not leader.is_held()
+    assert follower.try_acquire()
+    follower.release()
+
+
+def test_only_the_lock_holder_runs_the_scheduler(lock_key: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(notifier, "LEADER_RETRY_INTERVAL", 0.01)
+    scheduler = NotificationScheduler()
+    scheduler._lock = LeaderLock(lock_key)
+    led = []
+
+    async def lead() -> None:
+        led.append(True)
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(scheduler, "_lead", lead)
+
+    async def run_briefly() -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.run(), 0.2)
+
+    other_worker = LeaderLock(lock_key)
+    assert other_worker.try_acquire()
+    asyncio.run(run_briefly())
+    assert led == []
+
+    other_worker.release()
+    asyncio.run(run_briefly())
+    assert led == [True]
+    # Stopping the leader hands the lock over
+    assert other_worker.try_acquire()
+    other_worker.release()
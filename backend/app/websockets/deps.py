@@ -1,20 +1,26 @@
-from typing import Annotated
+from typing import Annotated, Any
 
 from fastapi import Depends, Query, WebSocket, WebSocketException, status
+from fastapi.concurrency import run_in_threadpool
 import jwt
 from pydantic import ValidationError
+from sqlmodel import Session
 
 from app.core import security, config
 from app.core.config import settings
 from app.models import User
-from app.api.deps import SessionDep
+from app.core.db import engine
 from app.models import TokenPayload
 
 TokenWS = Annotated[str, Query(alias="token")]
 
+def load_user(user_id: Any) -> User | None:
+    # Short-lived session, a dependency session would stay open for the socket's lifetime
+    with Session(engine) as session:
+        return session.get(User, user_id)
+
 async def get_current_user_ws(
     token: TokenWS,
-    session: SessionDep,
 ) -> User:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
@@ -24,7 +30,7 @@ async def get_current_user_ws(
             code=status.WS_1008_POLICY_VIOLATION,
             reason="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    user = await run_in_threadpool(load_user, token_data.sub)
     if not user:
         raise WebSocketException(
             code=status.WS_1008_POLICY_VIOLATION,
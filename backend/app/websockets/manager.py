@@ -1,62 +1,208 @@
+import asyncio
 import json
-from typing import Dict, Set
-from fastapi import WebSocket
+import logging
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import WebSocket, status
+
+from app.websockets.pubsub import MAX_NOTIFY_PAYLOAD, PubSub, pubsub
+
+logger = logging.getLogger(__name__)
+
+FANOUT_CHANNEL = "websocket_fanout"
+
+# Messages waiting for one connection before it counts as too slow and is closed
+SEND_QUEUE_HIGH_WATER = 256
+
+
+class ConnectionWriter:
+    """Sends queued messages to one websocket from its own task."""
+
+    def __init__(self, websocket: WebSocket, user_id: str):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=SEND_QUEUE_HIGH_WATER)
+        self.task = asyncio.create_task(self._run())
+
+    def enqueue(self, text: str) -> bool:
+        """Queues a message, returns False if the queue is full."""
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self):
+        self.task.cancel()
+
+    async def _run(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await self.websocket.send_text(text)
+            except Exception as e:
+                logger.warning(f"Failed to send message to user {self.user_id}: {e}")
+                return
+
 
 class ConnectionManager:
-    def __init__(self):
-        # Map user_id -> WebSocket connection
-        self.user_to_connection: Dict[str, WebSocket] = {}
+    """
+    Keeps the websocket connections of this process. Sends go through the pub/sub
+    backend, so every worker delivers them to the connections it holds.
+    A user may hold several connections, rooms are joined per connection.
+    User and event ids are stored as strings, the way they travel between workers.
+    """
+
+    def __init__(self, pubsub: PubSub):
+        # Connection -> its writer, which also knows the connection's user
+        self.writers: dict[WebSocket, ConnectionWriter] = {}
+        # user_id -> connections of the user
+        self.user_connections: dict[str, set[WebSocket]] = {}
+        # event_id -> connections in the event chat room
+        self.room_connections: dict[str, set[WebSocket]] = {}
+        # Connection -> event_ids of the rooms it joined
+        self.connection_rooms: dict[WebSocket, set[str]] = {}
+        # Connections closed for falling behind
+        self.dropped_connections = 0
 
-        # event_id -> set of user_ids
-        self.event_to_users: Dict[str, Set[str]] = {}
+        self.pubsub = pubsub
+        pubsub.subscribe(FANOUT_CHANNEL, self._deliver)
 
     async def connect(self, websocket: WebSocket, user_id: str):
-        """Establish connection and associate WebSocket with user_id."""
+        """Establish connection and register it among the connections of user_id."""
         await websocket.accept()
-        self.user_to_connection[user_id] = websocket
+        user_id = str(user_id)
+        self.writers[websocket] = ConnectionWriter(websocket, user_id)
+        self.user_connections.setdefault(user_id, set()).add(websocket)
 
     def disconnect(self, websocket: WebSocket, user_id: str):
-        """Disconnect the WebSocket and remove the association."""
-        if user_id in self.user_to_connection:
-            self.user_to_connection.pop(user_id, None)
-        # Clean user from all event rooms
-        for users in self.event_to_users.values():
-            users.discard(user_id)
+        """Unregister the connection and remove it from the rooms it joined."""
+        writer = self.writers.pop(websocket, None)
+        if writer is None:
+            return
+        writer.close()
+
+        connections = self.user_connections.get(writer.user_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.user_connections[writer.user_id]
+
+        for event_id in self.connection_rooms.pop(websocket, set()):
+            self._leave_room(websocket, event_id)
 
     async def send_personal_message(self, json_data: dict, user_id: str):
         """Send a personal message to a user based on their user_id."""
-        websocket = self.user_to_connection.get(user_id)
-        if websocket:
-            message = json.dumps(json_data)
-            await websocket.send_text(message)
-            print(f"Sent message to user {user_id}")
-        else:
-            print(f"No connection found for user {user_id}")
+        await self.send_personal_messages([(user_id, json_data)])
+
+    async def send_personal_messages(self, batch: Iterable[tuple[Any, dict]]):
+        """
+        Send a batch of (user_id, json_data) messages.
+        The batch is published in as few notifications as fit the payload limit.
+        """
+        chunk: list[tuple[str, dict]] = []
+        chunk_size = 0
+        for user_id, json_data in batch:
+            item_size = len(json.dumps(json_data).encode()) + 64
+            if chunk and chunk_size + item_size > MAX_NOTIFY_PAYLOAD:
+                await self.pubsub.publish(FANOUT_CHANNEL, {"type": "users", "messages": chunk})
+                chunk, chunk_size = [], 0
+            chunk.append((str(user_id), json_data))
+            chunk_size += item_size
+        if chunk:
+            await self.pubsub.publish(FANOUT_CHANNEL, {"type": "users", "messages": chunk})
 
     async def broadcast(self, message: str):
         """Broadcast message to all connected users."""
-        for websocket in self.user_to_connection.values():
-            await websocket.send_text(message)
+        await self.pubsub.publish(FANOUT_CHANNEL, {"type": "broadcast", "text": message})
+
 
+    def join_event(self, websocket: WebSocket, event_id: str):
+        """Add a connection to an event chat room."""
+        event_id = str(event_id)
+        self.room_connections.setdefault(event_id, set()).add(websocket)
+        self.connection_rooms.setdefault(websocket, set()).add(event_id)
 
-    def join_event(self, user_id: str, event_id: str):
-        """Add a user to an event chat room."""
-        if event_id not in self.event_to_users:
-            self.event_to_users[event_id] = set()
-        self.event_to_users[event_id].add(user_id)
+    def leave_event(self, websocket: WebSocket, event_id: str):
+        """Remove a connection from an event chat room."""
+        event_id = str(event_id)
+        rooms = self.connection_rooms.get(websocket)
+        if rooms is not None:
+            rooms.discard(event_id)
+        self._leave_room(websocket, event_id)
 
-    def leave_event(self, user_id: str, event_id: str):
-        """Remove a user from an event chat room."""
-        if event_id in self.event_to_users:
-            self.event_to_users[event_id].discard(user_id)
+    def _leave_room(self, websocket: WebSocket, event_id: str):
+        connections = self.room_connections.get(event_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.room_connections[event_id]
 
     async def send_message_to_event(self, event_id: str, message_data: dict):
         """Send a message to all users in an event."""
-        user_ids = self.event_to_users.get(event_id, set())
-        for user_id in user_ids:
-            websocket = self.user_to_connection.get(user_id)
-            if websocket:
-                await websocket.send_text(json.dumps(message_data))
+        await self.pubsub.publish(
+            FANOUT_CHANNEL, {"type": "event", "event_id": str(event_id), "data": message_data}
+        )
+
+    async def _deliver(self, payload: dict[str, Any]):
+        """
+        Queues a published payload for the matching connections of this process.
+        Every payload is serialized once, writers send it on their own.
+        """
+        if payload["type"] == "users":
+            deliveries = []
+            for user_id, json_data in payload["messages"]:
+                connections = self.user_connections.get(user_id)
+                if connections:
+                    text = json.dumps(json_data)
+                    deliveries.extend((websocket, text) for websocket in connections)
+        elif payload["type"] == "event":
+            text = json.dumps(payload["data"])
+            deliveries = [(websocket, text) for websocket in self.room_connections.get(payload["event_id"], ())]
+        else:
+            deliveries = [(websocket, payload["text"]) for websocket in self.writers]
+
+        for websocket, text in deliveries:
+            self.send_to_connection(websocket, text)
+
+    def send_to_connection(self, websocket: WebSocket, text: str):
+        """Queues a text for one connection of this process, closing it if it can't keep up."""
+        writer = self.writers.get(websocket)
+        # Disconnected, or dropped earlier in this delivery
+        if writer is None:
+            return
+        if not writer.enqueue(text):
+            self._drop(websocket, writer.user_id)
+
+    def _drop(self, websocket: WebSocket, user_id: str):
+        """Closes a connection that can't keep up, so it doesn't hold messages for the rest."""
+        logger.warning(f"Closing connection of user {user_id}: send queue is full")
+        self.dropped_connections += 1
+        self.disconnect(websocket, user_id)
+        asyncio.create_task(self._close(websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    def queue_stats(self) -> dict[str, Any]:
+        """Send queue depths of the connections of this process."""
+        depths: dict[str, list[int]] = {}
+        for writer in self.writers.values():
+            depths.setdefault(writer.user_id, []).append(writer.queue.qsize())
+        all_depths = [depth for user_depths in depths.values() for depth in user_depths]
+        return {
+            "connections": len(all_depths),
+            "users": len(depths),
+            "queued_messages": sum(all_depths),
+            "max_queue_depth": max(all_depths, default=0),
+            "high_water": SEND_QUEUE_HIGH_WATER,
+            "dropped_connections": self.dropped_connections,
+            "queue_depths": depths,
+        }
 
 
-manager = ConnectionManager()
+manager = ConnectionManager(pubsub)
@@ -1,24 +1,211 @@
 import asyncio
-import datetime
+import heapq
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import TypeVar
 from uuid import UUID
-from app.api.deps import get_db
+
+from sqlalchemy import Connection, func
+from sqlmodel import Session, select
+
+from app.core.db import engine
 from app.notifications.events_check import (
+    clean_old_notifications,
     generate_notifications_from_upcoming_events,
+    get_pending_send_times,
     get_upcoming_notifications,
-    clean_old_notifications
 )
 from app.websockets.manager import manager
+from app.websockets.pubsub import pubsub
 
-async def send_scheduled_notifications_loop():
-    while True:
-        db = next(get_db())
-        generate_notifications_from_upcoming_events(db)
-        notifications = get_upcoming_notifications(db)
-        for user_id, json_data in notifications:
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Reminders are generated this far ahead, the scheduler refreshes
+# at least this often so no reminder is due before it is loaded
+REFRESH_INTERVAL = timedelta(minutes=5)
+
+# Key of the Postgres advisory lock held by the worker running the scheduler
+SCHEDULER_LOCK_KEY = 0x6E6F7469
+# Seconds between attempts of the other workers to take over
+LEADER_RETRY_INTERVAL = 10
+
+RELOAD_CHANNEL = "notification_scheduler_reload"
+
+
+class LeaderLock:
+    """
+    Session level Postgres advisory lock on a dedicated connection.
+    The lock is released when the connection closes, so a crashed
+    leader hands the scheduler over to another worker.
+    """
+
+    def __init__(self, key: int) -> None:
+        self.key = key
+        self._connection: Connection | None = None
+
+    def try_acquire(self) -> bool:
+        connection = engine.connect()
+        try:
+            acquired = connection.execute(select(func.pg_try_advisory_lock(self.key))).scalar()
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def is_held(self) -> bool:
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute(select(1))
+            self._connection.commit()
+            return True
+        except Exception:
+            self.release()
+            return False
+
+    def release(self) -> None:
+        if self._connection is not None:
+            # Closing the connection drops the lock even if unlocking fails
+            try:
+                self._connection.execute(select(func.pg_advisory_unlock(self.key)))
+                self._connection.commit()
+            finally:
+                self._connection.close()
+                self._connection = None
+
+
+class NotificationScheduler:
+    """
+    Sleeps until the next due reminder instead of polling.
+    Upcoming send times are kept in a min-heap, loaded from the database on every
+    refresh: every REFRESH_INTERVAL and whenever an event changes.
+    Database work runs in a single worker thread, so the event loop never blocks on it.
+    With several workers only the one holding the advisory lock runs it.
+    """
+
+    def __init__(self) -> None:
+        self._send_times: list[datetime] = []
+        self._scheduled: set[datetime] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notifier")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._changed: asyncio.Event | None = None
+        self._next_refresh = datetime.min
+        self._lock = LeaderLock(SCHEDULER_LOCK_KEY)
+        pubsub.subscribe(RELOAD_CHANNEL, self._on_reload)
+
+    def reload(self) -> None:
+        """
+        Wakes the scheduler to reload send times, in whichever worker runs it.
+        Safe to call from any thread.
+        """
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(pubsub.publish(RELOAD_CHANNEL, {}), self._loop)
+
+    async def _on_reload(self, payload: dict) -> None:
+        if self._changed is not None:
+            self._changed.set()
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        while True:
             try:
-                await manager.send_personal_message(json_data, UUID(str(user_id)))
+                acquired = await self._loop.run_in_executor(self._executor, self._lock.try_acquire)
             except Exception as e:
-                print(f"Failed to send notification to {user_id}: {e}")
-        clean_old_notifications(db)
-        db.close()
-        await asyncio.sleep(30)
+                logger.exception(f"Failed to take the notification scheduler lock: {e}")
+                acquired = False
+            if not acquired:
+                await asyncio.sleep(LEADER_RETRY_INTERVAL)
+                continue
+
+            logger.info("Notification scheduler started in this worker")
+            try:
+                await self._lead()
+            finally:
+                self._send_times.clear()
+                self._scheduled.clear()
+                self._next_refresh = datetime.min
+                await self._loop.run_in_executor(self._executor, self._lock.release)
+            logger.warning("Notification scheduler lost its lock")
+
+    async def _lead(self) -> None:
+        while True:
+            try:
+                if self._changed.is_set() or datetime.now() >= self._next_refresh:
+                    self._changed.clear()
+                    if not await self._loop.run_in_executor(self._executor, self._lock.is_held):
+                        return
+                    await self._refresh()
+                if self._send_times and self._send_times[0] <= datetime.now():
+                    await self._dispatch_due()
+                await self._sleep_until_next()
+            except Exception as e:
+                logger.exception(f"Notification scheduler tick failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _in_thread(self, work: Callable[[Session], T]) -> T:
+        def run() -> T:
+            with Session(engine) as session:
+                return work(session)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+
+    async def _refresh(self) -> None:
+        self._next_refresh = datetime.now() + REFRESH_INTERVAL
+        until = self._next_refresh
+
+        def load(session: Session) -> list[datetime]:
+            generate_notifications_from_upcoming_events(session, horizon=REFRESH_INTERVAL)
+            clean_old_notifications(session)
+            return get_pending_send_times(session, until)
+
+        self._schedule(await self._in_thread(load))
+
+    def _schedule(self, send_times: list[datetime]) -> None:
+        for send_time in send_times:
+            if send_time not in self._scheduled:
+                self._scheduled.add(send_time)
+                heapq.heappush(self._send_times, send_time)
+
+    async def _dispatch_due(self) -> None:
+        now = datetime.now()
+        while self._send_times and self._send_times[0] <= now:
+            self._scheduled.discard(heapq.heappop(self._send_times))
+
+        until = self._next_refresh
+
+        def dispatch(session: Session) -> tuple[list, list[datetime]]:
+            notifications = get_upcoming_notifications(session)
+            # Dispatched rows moved on to their next reminder offset
+            return notifications, get_pending_send_times(session, until)
+
+        notifications, send_times = await self._in_thread(dispatch)
+        self._schedule(send_times)
+        await manager.send_personal_messages(
+            (UUID(str(user_id)), json_data) for user_id, json_data in notifications
+        )
+
+    async def _sleep_until_next(self) -> None:
+        wake_at = self._next_refresh
+        if self._send_times:
+            wake_at = min(wake_at, self._send_times[0])
+        timeout = max(0.0, (wake_at - datetime.now()).total_seconds())
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+notification_scheduler = NotificationScheduler()
+
+
+async def send_scheduled_notifications_loop():
+    await notification_scheduler.run()
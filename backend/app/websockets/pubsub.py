@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import psycopg
+from psycopg import sql
+from psycopg.conninfo import make_conninfo
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict[str, Any]], Awaitable[None]]
+
+# Postgres rejects NOTIFY payloads of 8000 bytes and more
+MAX_NOTIFY_PAYLOAD = 7900
+# Seconds to wait before reconnecting a broken listener
+RECONNECT_INTERVAL = 5
+
+
+class PubSub(ABC):
+    """
+    Delivers published payloads to the handlers subscribed to a channel
+    in every process using the same backend. Payloads are JSON objects.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[Handler]] = {}
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """Registers a handler, must be called before start."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    @abstractmethod
+    async def start(self) -> None:
+        """Starts receiving published payloads."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Stops receiving published payloads and releases the backend's connections."""
+
+    @abstractmethod
+    async def publish(self, channel: str, payload: dict[str, Any]) -> None:
+        ...
+
+    async def _dispatch(self, channel: str, payload: dict[str, Any]) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(payload)
+            except Exception as e:
+                logger.exception(f"Handler of channel {channel} failed: {e}")
+
+
+class InMemoryPubSub(PubSub):
+    """Delivers to the handlers of this process only, for tests and single worker runs."""
+
+    async def start(self) -> None:
+        # Nothing to listen to, publish calls the handlers directly
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    async def publish(self, channel: str, payload: dict[str, Any]) -> None:
+        await self._dispatch(channel, payload)
+
+
+class PostgresPubSub(PubSub):
+    """
+    Fans payloads out through Postgres LISTEN/NOTIFY, so every worker on every host
+    connected to the database receives them. Uses one connection for listening and
+    one for publishing, both outside of the SQLAlchemy pool.
+    Payloads that don't fit into a notification are delivered in this process only.
+    """
+
+    def __init__(self, conninfo: str) -> None:
+        super().__init__()
+        self._conninfo = conninfo
+        self._publisher: psycopg.AsyncConnection | None = None
+        self._listener_task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._publisher = await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True)
+        listener = await self._connect_listener()
+        self._listener_task = asyncio.create_task(self._listen(listener))
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+        if self._publisher is not None:
+            await self._publisher.close()
+            self._publisher = None
+
+    async def publish(self, channel: str, payload: dict[str, Any]) -> None:
+        message = json.dumps(payload)
+        if self._publisher is None or len(message.encode()) > MAX_NOTIFY_PAYLOAD:
+            logger.warning(f"Delivering a message of channel {channel} in this process only")
+            await self._dispatch(channel, payload)
+            return
+        try:
+            await self._publisher.execute("SELECT pg_notify(%s, %s)", (channel, message))
+        except psycopg.OperationalError:
+            # The connection was lost, reconnect once and retry
+            self._publisher = await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True)
+            await self._publisher.execute("SELECT pg_notify(%s, %s)", (channel, message))
+
+    async def _connect_listener(self) -> psycopg.AsyncConnection:
+        connection = await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True)
+        for channel in self._handlers:
+            await connection.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+        return connection
+
+    async def _listen(self, connection: psycopg.AsyncConnection) -> None:
+        while True:
+            try:
+                async for notify in connection.notifies():
+                    await self._dispatch(notify.channel, json.loads(notify.payload))
+            except asyncio.CancelledError:
+                await connection.close()
+                raise
+            except Exception as e:
+                logger.exception(f"Pub/sub listener failed, reconnecting: {e}")
+                await connection.close()
+                while True:
+                    await asyncio.sleep(RECONNECT_INTERVAL)
+                    try:
+                        connection = await self._connect_listener()
+                        break
+                    except psycopg.OperationalError as e:
+                        logger.warning(f"Pub/sub listener reconnect failed: {e}")
+
+
+def create_pubsub() -> PubSub:
+    if settings.WEBSOCKET_PUBSUB == "memory":
+        return InMemoryPubSub()
+    return PostgresPubSub(make_conninfo(
+        host=settings.POSTGRES_SERVER,
+        port=settings.POSTGRES_PORT,
+        user=settings.POSTGRES_USER,
+        password=settings.POSTGRES_PASSWORD,
+        dbname=settings.POSTGRES_DB,
+    ))
+
+
+pubsub = create_pubsub()
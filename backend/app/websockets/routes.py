@@ -1,11 +1,14 @@
+import json
+
 from fastapi import WebSocket, WebSocketDisconnect, status
-from ..models import Message, MessageCreate, EventParticipant
-from app.api.deps import get_db
-from app.websockets.router import websocket_route
-from app.websockets.manager import manager
+from fastapi.concurrency import run_in_threadpool
+
+from app.chat.store import can_send_to_event_chat, message_writer
 from app.websockets.deps import CurrentUserWS
-from app.chat.permissions import is_user_participant_of_event
-from sqlmodel import select
+from app.websockets.manager import manager
+from app.websockets.router import websocket_route
+
+from ..models import MessageCreate
 
 
 @websocket_route("/ws/echo")
@@ -16,7 +19,7 @@ async def echo_ws(websocket: WebSocket, user: CurrentUserWS):
     try:
         while True:
             data = await websocket.receive_text()
-            await websocket.send_text(f"{user.full_name} says: {data}")
+            manager.send_to_connection(websocket, f"{user.full_name} says: {data}")
     except WebSocketDisconnect:
         manager.disconnect(websocket, user_id)
 
@@ -37,35 +40,28 @@ async def hello_ws(websocket: WebSocket, user: CurrentUserWS):
 @websocket_route("/ws/event/{event_id}")
 async def event_chat_ws(websocket: WebSocket, user: CurrentUserWS, event_id: str):
     """WebSocket for chatting inside a specific event."""
-    db = next(get_db())
-    if not is_user_participant_of_event(db, event_id, user.id):
+    # Database calls run in the thread pool with their own short-lived sessions
+    can_send = await run_in_threadpool(can_send_to_event_chat, event_id, user.id)
+    if can_send is None:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    participant = db.exec(
-        select(EventParticipant).where(
-            EventParticipant.event_id == event_id,
-            EventParticipant.user_id == user.id
-        )
-    ).first()
-
-
     user_id = user.id
 
     await manager.connect(websocket, user_id)
-    manager.join_event(user_id, event_id)
+    manager.join_event(websocket, event_id)
 
     try:
         while True:
             data = await websocket.receive_text()
 
             # Block messages from listeners
-            if participant.is_listener:
+            if not can_send:
                 error_msg = {
                     "type": "error",
                     "detail": "Listeners cannot send messages"
                 }
-                await websocket.send_json(error_msg)
+                manager.send_to_connection(websocket, json.dumps(error_msg))
                 continue
 
             full_name = user.full_name
@@ -77,27 +73,9 @@ async def event_chat_ws(websocket: WebSocket, user: CurrentUserWS, event_id: str
                 event_id=event_id,
                 full_name=full_name
             )
-            # Save message to the database
-            db_message = Message(
-                content=message.content,
-                user_id=message.user_id,
-                event_id=message.event_id,
-                full_name = message.full_name
-            )
-            db.add(db_message)
-            db.commit()
-            db.refresh(db_message)
-            # Prepare the message data to send to other users
-            message_data = {
-                "id": str(db_message.id), 
-                "content": db_message.content,
-                "user_id": str(db_message.user_id),
-                "event_id": str(db_message.event_id),
-                "timestamp": db_message.timestamp.isoformat(),
-                "full_name": db_message.full_name,
-            }
+            # Broadcast right away, the message is stored with the next batch
+            message_data = await message_writer.add(message)
 
             await manager.send_message_to_event(event_id, message_data)
     except WebSocketDisconnect:
         manager.disconnect(websocket, user_id)
-        manager.leave_event(user_id, event_id)
@@ -0,0 +1,103 @@
+import sys
+import os
+from pathlib import Path
+
+# Add the project root directory to PYTHONPATH
+project_root = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_root)
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+
+from app.api.uploads import stream_upload
+
+# Benchmark of the streaming upload pipeline: concurrent multipart uploads go
+# through stream_upload in-process, while a probe task measures how late the
+# event loop wakes up. A blocked loop shows up as a large lag.
+#
+#   python scripts/benchmark_uploads.py --uploads 8 --size-mb 100
+
+BOUNDARY = "benchmark-boundary"
+CHUNK = os.urandom(64 * 1024)
+
+
+def create_app(directory: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        upload = await stream_upload(request, directory, max_size=1 << 40)
+        upload.discard()
+        return {"size": upload.size, "sha256": upload.sha256}
+
+    return app
+
+
+async def multipart_body(size: int):
+    yield (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="recording.bin"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    sent = 0
+    while sent < size:
+        chunk = CHUNK[:size - sent]
+        sent += len(chunk)
+        yield chunk
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list[float], interval: float = 0.01):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(uploads: int, size: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        transport = httpx.ASGITransport(app=create_app(directory))
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            stop = asyncio.Event()
+            lags: list[float] = []
+            probe = asyncio.create_task(measure_loop_lag(stop, lags))
+
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(
+                client.post(
+                    "/upload",
+                    content=multipart_body(size),
+                    headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+                )
+                for _ in range(uploads)
+            ))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await probe
+
+    for response in responses:
+        response.raise_for_status()
+        assert response.json()["size"] == size
+
+    total_mb = uploads * size / (1024 * 1024)
+    lags.sort()
+    print(f"{uploads} concurrent uploads of {size / (1024 * 1024):.0f} MB in {elapsed:.2f}s")
+    print(f"Throughput: {total_mb / elapsed:.1f} MB/s")
+    print(f"Event loop lag: p50 {lags[len(lags) // 2] * 1000:.1f} ms, "
+          f"p99 {lags[int(len(lags) * 0.99)] * 1000:.1f} ms, max {lags[-1] * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent streaming uploads")
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.uploads, args.size_mb * 1024 * 1024))
+
+if __name__ == "__main__":
+    main()
@@ -63,7 +63,12 @@ const EventFiles: React.FC<IEventFilesProps> = ({ eventId }) => {
 
 	const fetchFiles = async () => {
 		try {
-			const response = await dispatch(getEventFiles(eventId)).unwrap();
+			const token = localStorage.getItem('token');
+			if (!token) {
+				throw new Error('No authentication token found');
+			}
+
+			const response = await dispatch(getEventFiles({ eventId, token })).unwrap();
 			setFiles(response);
 			setLoading(false);
 		} catch (err) {
@@ -136,10 +136,18 @@ export const getEventMessages = createAsyncThunk<{ data: IChatMessage[]; count:
 	},
 );
 
-export const getEventFiles = createAsyncThunk('events/getEventFiles', async (eventId: string) => {
-	const response = await axios.get(`http://localhost:8000/api/v1/events/${eventId}/files`);
-	return response.data;
-});
+// The listed file and preview URLs are signed, links and images open them without the token
+export const getEventFiles = createAsyncThunk(
+	'events/getEventFiles',
+	async ({ eventId, token }: { eventId: string; token: string }) => {
+		const response = await axios.get(`http://localhost:8000/api/v1/events/${eventId}/files`, {
+			headers: {
+				Authorization: `Bearer ${token}`,
+			},
+		});
+		return response.data;
+	},
+);
 
 export const uploadEventFile = createAsyncThunk(
 	'events/uploadEventFile',